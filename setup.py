@@ -7,52 +7,98 @@ This script helps you set up the KuruSwap Telegram Bot quickly.
 
 import os
 import sys
-import subprocess
+import runpy
+import importlib
+import shutil
+import tempfile
+
+from start_bot import MONAD_RPC_URL, REQUIREMENTS_FILE, _probe_monad, _req_hash
+
+STAMP_FILE = ".venv_stamp"
+ENV_FILE = ".env"
+ENV_EXAMPLE_FILE = ".env.example"
+
+_PYVER = '%d.%d.%d' % sys.version_info[:3]
+_PY_OK = sys.version_info >= (3, 8)
+
+def _stat(path):
+    """Return os.stat() for path, or None if it doesn't exist."""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
 
 def check_python_version():
     """Check if Python version is compatible."""
-    if sys.version_info < (3, 8):
+    if not _PY_OK:
         print("❌ Error: Python 3.8 or higher is required.")
-        print(f"Current version: {sys.version}")
+        print(f"Current version: {_PYVER}")
         return False
-    print(f"✅ Python version: {sys.version.split()[0]}")
+    print(f"✅ Python version: {_PYVER}")
     return True
 
 def install_requirements():
     """Install required packages."""
+    req_hash = _req_hash()
+    try:
+        with open(STAMP_FILE, 'r') as f:
+            if f.read().strip() == req_hash:
+                print("✅ Requirements unchanged since last install, skipping pip.")
+                return True
+    except FileNotFoundError:
+        pass
+    
     print("📦 Installing required packages...")
+    # Run pip inside this interpreter instead of spawning a new one
+    saved_argv = sys.argv
+    sys.argv = [
+        "pip", "install",
+        "--disable-pip-version-check",
+        "--no-input",
+        "--prefer-binary",
+        "--upgrade-strategy", "only-if-needed",
+        "-r", REQUIREMENTS_FILE
+    ]
+    os.environ.setdefault("PIP_NO_PYTHON_VERSION_WARNING", "1")
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
-        print("✅ All packages installed successfully!")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error installing packages: {e}")
+        runpy.run_module("pip", run_name="__main__", alter_sys=True)
+        exit_code = 0
+    except SystemExit as e:
+        exit_code = e.code
+    finally:
+        sys.argv = saved_argv
+    
+    if exit_code not in (0, None):
+        print(f"❌ Error installing packages: pip exited with status {exit_code}")
         return False
+    
+    # Make the freshly installed packages importable in this process
+    importlib.invalidate_caches()
+    with open(STAMP_FILE, 'w') as f:
+        f.write(req_hash)
+    print("✅ All packages installed successfully!")
+    return True
 
-def setup_environment():
+def setup_environment(env_stat):
     """Set up environment file."""
-    env_file = ".env"
-    example_file = ".env.example"
+    env_file = ENV_FILE
+    example_file = ENV_EXAMPLE_FILE
     
-    if os.path.exists(env_file):
+    if env_stat is not None:
         print(f"✅ {env_file} already exists.")
         return True
     
-    if not os.path.exists(example_file):
+    if _stat(example_file) is None:
         print(f"❌ {example_file} not found.")
         return False
     
     # Copy example to .env
-    with open(example_file, 'r') as f:
-        content = f.read()
-    
-    with open(env_file, 'w') as f:
-        f.write(content)
+    shutil.copyfile(example_file, env_file)
     
     print(f"✅ Created {env_file} from {example_file}")
     return True
 
-def get_bot_token():
+def get_bot_token(env_stat):
     """Get bot token from user."""
     print("\n🤖 Telegram Bot Setup")
     print("To create a Telegram bot:")
@@ -65,20 +111,31 @@ def get_bot_token():
     
     if token:
         # Update .env file
-        env_file = ".env"
-        if os.path.exists(env_file):
-            with open(env_file, 'r') as f:
-                content = f.read()
+        env_file = ENV_FILE
+        if env_stat is not None:
+            # Stream into a temp file and swap it in atomically
+            with open(env_file, 'r', newline='') as src, tempfile.NamedTemporaryFile(
+                'w', newline='', dir='.', delete=False
+            ) as tmp:
+                replaced = False
+                line = ''
+                for line in src:
+                    if line.startswith('BOT_TOKEN='):
+                        # Keep the file's own line ending (.env may be CRLF)
+                        ending = line[len(line.rstrip('\r\n')):]
+                        tmp.write(f'BOT_TOKEN={token}{ending}')
+                        replaced = True
+                        break
+                    tmp.write(line)
+                
+                # Copy the rest of the file untouched
+                shutil.copyfileobj(src, tmp)
+                if not replaced:
+                    if line and not line.endswith('\n'):
+                        tmp.write('\n')
+                    tmp.write(f'BOT_TOKEN={token}\n')
             
-            # Replace the token line
-            lines = content.split('\n')
-            for i, line in enumerate(lines):
-                if line.startswith('BOT_TOKEN='):
-                    lines[i] = f'BOT_TOKEN={token}'
-                    break
-            
-            with open(env_file, 'w') as f:
-                f.write('\n'.join(lines))
+            os.replace(tmp.name, env_file)
             
             print("✅ Bot token saved to .env file")
             return True
@@ -90,18 +147,10 @@ def test_connection():
     """Test connection to Monad testnet."""
     print("\n🌐 Testing connection to Monad Testnet...")
     try:
-        import requests
-        response = requests.post(
-            "https://testnet-rpc.monad.xyz",
-            json={"jsonrpc": "2.0", "method": "eth_chainId", "params": [], "id": 1},
-            timeout=10
-        )
-        if response.status_code == 200:
-            data = response.json()
-            chain_id = int(data.get('result', '0x0'), 16)
-            if chain_id == 10143:
-                print("✅ Successfully connected to Monad Testnet")
-                return True
+        ok, is_monad = _probe_monad(MONAD_RPC_URL, timeout=(2, 3))
+        if ok and is_monad:
+            print("✅ Successfully connected to Monad Testnet")
+            return True
         print("❌ Failed to connect to Monad Testnet")
         return False
     except Exception as e:
@@ -122,11 +171,12 @@ def main():
         return False
     
     # Setup environment
-    if not setup_environment():
+    env_stat = _stat(ENV_FILE)
+    if not setup_environment(env_stat):
         return False
     
-    # Get bot token
-    get_bot_token()
+    # Get bot token (.env was just created if it didn't exist before)
+    get_bot_token(env_stat or _stat(ENV_FILE))
     
     # Test connection
     test_connection()
@@ -8,23 +8,99 @@ Simple launcher script with pre-flight checks.
 import os
 import sys
 import subprocess
+import importlib.util
+import hashlib
+import json
+import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+# When launched as a script, register this module under its import name so
+# telegram_bot shares the same dotenv cache instead of re-importing us.
+if __name__ == "__main__":
+    sys.modules.setdefault("start_bot", sys.modules[__name__])
+
+MONAD_RPC_URL = "https://testnet-rpc.monad.xyz"
+MONAD_CHAIN_ID_HEX = b'"0x279f"'  # 10143, as returned by eth_chainId
+REQUIREMENTS_FILE = "requirements.txt"
+PREFLIGHT_STAMP = ".preflight_ok"
+PREFLIGHT_TTL = 300  # seconds
+
+# .env lives next to the scripts, so the bot finds it whatever the working directory
+DOTENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+
+_DOTENV_CACHE = None
+
+def _env():
+    """Parse .env once and expose its values through os.environ."""
+    global _DOTENV_CACHE
+    if _DOTENV_CACHE is None:
+        from dotenv import dotenv_values
+        _DOTENV_CACHE = dotenv_values(DOTENV_PATH)
+        for key, value in _DOTENV_CACHE.items():
+            if value is not None:
+                os.environ.setdefault(key, value)
+    return _DOTENV_CACHE
+
+def _req_hash():
+    """Hash requirements.txt (and the interpreter) so unchanged installs can be skipped."""
+    digest = hashlib.blake2b(sys.executable.encode(), digest_size=16)
+    with open(REQUIREMENTS_FILE, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+@lru_cache(maxsize=None)
+def _env_get(key, default=None):
+    """Cached os.environ lookup; call _env() first so .env values are visible."""
+    return os.environ.get(key, default)
+
+_SESSION = None
+
+def _http_session():
+    """Return a keep-alive requests session shared by the RPC probes."""
+    global _SESSION
+    if _SESSION is None:
+        # Imported lazily: setup.py calls this after installing requests
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        _SESSION = requests.Session()
+        _SESSION.mount('https://', HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=10,
+            max_retries=Retry(total=2, backoff_factor=0.2)
+        ))
+    return _SESSION
+
+@lru_cache(maxsize=1)
+def _probe_monad(url, timeout=(1, 2)):
+    """Send a single eth_chainId request and return (ok, is_monad)."""
+    response = _http_session().post(
+        url,
+        json={"jsonrpc": "2.0", "method": "eth_chainId", "params": [], "id": 1},
+        timeout=timeout
+    )
+    if response.status_code != 200:
+        return False, False
+    # Match the raw bytes instead of decoding JSON; this also copes with
+    # proxies that answer 200 with an HTML error page.
+    return True, MONAD_CHAIN_ID_HEX in response.content
 
 def check_requirements():
     """Check if all requirements are met."""
     print("🔍 Checking requirements...")
     
     # Check if .env file exists
-    if not os.path.exists('.env'):
+    if not os.path.exists(DOTENV_PATH):
         print("❌ .env file not found!")
         print("Run 'python setup.py' first to set up the bot.")
         return False
     
     # Check if bot token is set
     try:
-        from dotenv import load_dotenv
-        load_dotenv()
-        
-        bot_token = os.getenv('BOT_TOKEN')
+        _env()
+        bot_token = _env_get('BOT_TOKEN')
         if not bot_token or bot_token == 'YOUR_BOT_TOKEN_HERE':
             print("❌ Bot token not set!")
             print("Please update your .env file with a valid BOT_TOKEN.")
@@ -42,12 +118,8 @@ def check_requirements():
         'eth_account'
     ]
     
-    missing_packages = []
-    for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
-            missing_packages.append(package)
+    # find_spec only locates the packages, it doesn't execute them
+    missing_packages = [p for p in required_packages if importlib.util.find_spec(p) is None]
     
     if missing_packages:
         print(f"❌ Missing packages: {', '.join(missing_packages)}")
@@ -57,33 +129,65 @@ def check_requirements():
     print("✅ All required packages installed")
     return True
 
-def test_network_connection():
-    """Test connection to Monad testnet."""
+def test_network_connection(probe=None):
+    """Test connection to Monad testnet, optionally using an in-flight probe future."""
     print("🌐 Testing network connection...")
     try:
-        import requests
-        response = requests.get("https://testnet-rpc.monad.xyz", timeout=5)
-        if response.status_code in [200, 405]:  # 405 is also OK for RPC endpoints
+        ok, _ = probe.result() if probe is not None else _probe_monad(MONAD_RPC_URL)
+        if ok:
             print("✅ Network connection OK")
             return True
         else:
-            print(f"⚠️ Network response: {response.status_code}")
+            print("⚠️ Unexpected response from the RPC endpoint")
             return True  # Continue anyway
     except Exception as e:
         print(f"⚠️ Network test failed: {e}")
         print("Continuing anyway...")
         return True  # Don't block on network issues
 
+def _preflight_cached():
+    """Check for a recent .preflight_ok stamp matching this environment."""
+    if os.environ.get('KURU_FORCE_PREFLIGHT') == '1':
+        return False
+    try:
+        with open(PREFLIGHT_STAMP, 'r') as f:
+            stamp = json.load(f)
+        return (
+            time.time() - stamp['ts'] < PREFLIGHT_TTL
+            and stamp['py'] == list(sys.version_info[:2])
+            and stamp['req_hash'] == _req_hash()
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+def _write_preflight_stamp():
+    """Record that the pre-flight checks passed."""
+    try:
+        with open(PREFLIGHT_STAMP, 'w') as f:
+            json.dump({
+                'py': list(sys.version_info[:2]),
+                'req_hash': _req_hash(),
+                'ts': time.time()
+            }, f)
+    except OSError as e:
+        print(f"⚠️ Could not write {PREFLIGHT_STAMP}: {e}")
+
 def start_bot():
     """Start the telegram bot."""
     print("🚀 Starting KuruSwap Telegram Bot...")
     print("Press Ctrl+C to stop the bot")
     print("-" * 40)
     
+    # Only pay for the bot's imports once the pre-flight checks have passed
     try:
-        # Import and run the bot
-        from telegram_bot import main
-        main()
+        from telegram_bot import main as run_bot
+    except ImportError as e:
+        print(f"\n❌ Could not load the bot: {e}")
+        print("Run 'pip install -r requirements.txt' and try again.")
+        return False
+    
+    try:
+        run_bot()
     except KeyboardInterrupt:
         print("\n👋 Bot stopped by user")
     except Exception as e:
@@ -98,14 +202,26 @@ def main():
     print("🤖 KuruSwap Telegram Bot Launcher")
     print("=" * 40)
     
-    # Run pre-flight checks
-    if not check_requirements():
-        print("\n❌ Pre-flight checks failed!")
-        print("Please fix the issues above and try again.")
-        return False
-    
-    if not test_network_connection():
-        print("\n⚠️ Network issues detected, but continuing...")
+    if _preflight_cached():
+        print("✅ Pre-flight checks passed recently, skipping them")
+        print("   (set KURU_FORCE_PREFLIGHT=1 to run them again)")
+    else:
+        # Probe the network in the background while the local checks run
+        executor = ThreadPoolExecutor(max_workers=1)
+        probe = executor.submit(_probe_monad, MONAD_RPC_URL)
+        executor.shutdown(wait=False)
+        
+        # Run pre-flight checks
+        if not check_requirements():
+            probe.cancel()
+            print("\n❌ Pre-flight checks failed!")
+            print("Please fix the issues above and try again.")
+            return False
+        
+        if not test_network_connection(probe):
+            print("\n⚠️ Network issues detected, but continuing...")
+        
+        _write_preflight_stamp()
     
     print("\n✅ All checks passed!")
     print("\n" + "=" * 40)
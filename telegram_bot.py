@@ -10,7 +10,10 @@ A Telegram bot that allows users to:
 Requires:
 - python-telegram-bot
 - web3
+- coincurve (optional, faster wallet creation)
+- cryptography (optional, private key encryption)
 - requests
+- orjson
 - sqlite3 (built-in)
 """
 
@@ -18,14 +21,39 @@ import logging
 import sqlite3
 import json
 import asyncio
+import base64
+import hashlib
+import html
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+import time
+import threading
+from collections import OrderedDict
 from typing import Dict, Optional, Tuple, List
 from decimal import Decimal
 
+import aiohttp
+import orjson
 import requests
+try:
+    import coincurve
+except ImportError:
+    coincurve = None
+try:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:
+    AESGCM = InvalidTag = None
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from web3 import Web3
+from eth_abi import decode as abi_decode, encode as abi_encode
 from eth_account import Account
+from eth_utils import keccak, to_checksum_address
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -33,17 +61,19 @@ from telegram.ext import (
     CallbackQueryHandler,
     ConversationHandler,
     ContextTypes,
+    Defaults,
     filters,
 )
 
+from start_bot import _env, _env_get
+
 try:
-    from dotenv import load_dotenv
-    load_dotenv()
+    _env()
 except ImportError:
     pass  # dotenv is optional
 
 # Enable logging
-log_level = logging.DEBUG if os.getenv('DEBUG', 'false').lower() == 'true' else logging.INFO
+log_level = logging.DEBUG if _env_get('DEBUG', 'false').lower() == 'true' else logging.INFO
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     level=log_level
@@ -51,20 +81,42 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Configuration from environment variables
-BOT_TOKEN = os.getenv('BOT_TOKEN', 'YOUR_BOT_TOKEN_HERE')
+BOT_TOKEN = _env_get('BOT_TOKEN', 'YOUR_BOT_TOKEN_HERE')
 if BOT_TOKEN == 'YOUR_BOT_TOKEN_HERE':
     logger.error("Please set your BOT_TOKEN in the .env file or environment variables")
     exit(1)
-RPC_URL = os.getenv('RPC_URL', 'https://testnet-rpc.monad.xyz')
-CHAIN_ID = int(os.getenv('CHAIN_ID', '10143'))
-TX_EXPLORER = os.getenv('TX_EXPLORER', 'https://testnet.monadexplorer.com/tx/')
-DATABASE_PATH = os.getenv('DATABASE_PATH', 'kuruswap_bot.db')
+RPC_URL = _env_get('RPC_URL', 'https://testnet-rpc.monad.xyz')
+CHAIN_ID = int(_env_get('CHAIN_ID', '10143'))
+TX_EXPLORER = _env_get('TX_EXPLORER', 'https://testnet.monadexplorer.com/tx/')
+DATABASE_PATH = _env_get('DATABASE_PATH', 'kuruswap_bot.db')
+TOKEN_CACHE_PATH = _env_get('TOKEN_CACHE_PATH', 'token_cache.json')
+WALLET_AES_KEY = _env_get('WALLET_AES_KEY')
+BOT_KEY = _env_get('BOT_KEY')
+TOKEN_CACHE_TTL = 24 * 60 * 60  # token metadata is immutable; refresh daily anyway
+TOKEN_CACHE_MAX = 4096  # least recently used tokens are evicted beyond this
+POOL_CACHE_TTL = 5 * 60  # market addresses rarely change
+POOL_CACHE_MAX = 1024  # oldest pools are evicted beyond this
+BALANCE_CACHE_TTL = 3.0  # covers menu hops like check balance -> start swap
+GAS_PRICE_TTL = 2.0  # back-to-back swaps reuse the last gas price quote
+
+KURU_API_URL = "https://api.testnet.kuru.io"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# Cheap shape checks for user input; EIP-55 casing is not enforced
+_ADDR_RE = re.compile(r'0x[0-9a-fA-F]{40}')
+_PK_RE = re.compile(r'0x[0-9a-fA-F]{64}')
+
+@lru_cache(maxsize=8192)
+def cs(address: str) -> str:
+    """Checksum an address, memoised so hot addresses are hashed only once."""
+    return Web3.to_checksum_address(address)
 
-# Contract addresses
-MON_ADDRESS = "0x0000000000000000000000000000000000000000"
-WMON_ADDRESS = "0x760AfE86e5de5fa0Ee542fc7B7B713e1c5425701"
-ROUTER_ADDRESS = "0xc816865f172d640d93712C68a7E1F83F3fA63235"
-KURU_UTILS_ADDRESS = "0x9E50D9202bEc0D046a75048Be8d51bBa93386Ade"
+# Contract addresses (checksummed once here so runtime paths skip EIP-55 hashing)
+MON_ADDRESS = Web3.to_checksum_address("0x0000000000000000000000000000000000000000")
+WMON_ADDRESS = Web3.to_checksum_address("0x760AfE86e5de5fa0Ee542fc7B7B713e1c5425701")
+ROUTER_ADDRESS = Web3.to_checksum_address("0xc816865f172d640d93712C68a7E1F83F3fA63235")
+KURU_UTILS_ADDRESS = Web3.to_checksum_address("0x9E50D9202bEc0D046a75048Be8d51bBa93386Ade")
+MULTICALL3_ADDRESS = Web3.to_checksum_address("0xcA11bde05977b3631167028862bE2a173976CA11")
 
 # Contract ABIs
 ROUTER_ABI = [
@@ -106,6 +158,43 @@ ERC20_ABI = [
     {"inputs": [{"internalType": "address", "name": "spender", "type": "address"}, {"internalType": "uint256", "name": "amount", "type": "uint256"}], "name": "approve", "outputs": [{"internalType": "bool", "name": "", "type": "bool"}], "stateMutability": "nonpayable", "type": "function"}
 ]
 
+# 4-byte selectors for the ERC20 metadata getters
+NAME_SELECTOR = Web3.to_hex(Web3.keccak(text="name()")[:4])
+SYMBOL_SELECTOR = Web3.to_hex(Web3.keccak(text="symbol()")[:4])
+DECIMALS_SELECTOR = Web3.to_hex(Web3.keccak(text="decimals()")[:4])
+
+# Multicall3 aggregate3 bundles many view calls into a single eth_call
+AGGREGATE3_SELECTOR = Web3.keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+
+# Router/utils calls are encoded directly with eth_abi instead of going
+# through web3's ContractFunction machinery on every swap
+ANY_TO_ANY_SWAP_TYPES = [arg['type'] for arg in ROUTER_ABI[0]['inputs']]
+ANY_TO_ANY_SWAP_SELECTOR = Web3.keccak(text=f"anyToAnySwap({','.join(ANY_TO_ANY_SWAP_TYPES)})")[:4]
+CALCULATE_PRICE_TYPES = [arg['type'] for arg in KURU_UTILS_ABI[0]['inputs']]
+CALCULATE_PRICE_SELECTOR = Web3.keccak(text=f"calculatePriceOverRoute({','.join(CALCULATE_PRICE_TYPES)})")[:4]
+
+# Shared HTTP session so RPC batch calls reuse keep-alive connections
+HTTP = requests.Session()
+HTTP.headers.update({
+    "User-Agent": USER_AGENT,
+    "Content-Type": "application/json",
+    "Accept-Encoding": "gzip, deflate"
+})
+_http_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    # Everything sent through HTTP is a read-only query, so POSTs are safe to retry
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=frozenset({"GET", "POST"})
+    )
+)
+HTTP.mount("http://", _http_adapter)
+HTTP.mount("https://", _http_adapter)
+HTTP_TIMEOUT = (3, 7)  # (connect, read) seconds
+
 # Conversation states
 AWAITING_TOKEN_ADDRESS, AWAITING_SWAP_AMOUNT, AWAITING_PRIVATE_KEY, AWAITING_WALLET_NAME = range(4)
 
@@ -129,9 +218,17 @@ except Exception as e:
     logger.error(f"Error initializing Web3: {e}")
     w3 = None
 
+# A healthy connection check is trusted for this long before probing the RPC again
+_CONN_TTL = 15.0
+_LAST_CONN_CHECK = [0.0]
+
 def ensure_web3_connected():
     """Ensure Web3 is connected and available."""
     global w3
+    now = time.monotonic()
+    if w3 is not None and now - _LAST_CONN_CHECK[0] < _CONN_TTL:
+        return True
+    
     if w3 is None:
         try:
             w3 = Web3(Web3.HTTPProvider(RPC_URL))
@@ -143,16 +240,151 @@ def ensure_web3_connected():
         logger.error("Web3 is not connected")
         return False
     
+    _LAST_CONN_CHECK[0] = now
     return True
 
+# Private keys are sealed at rest with one AES-GCM context built at startup.
+# WALLET_AES_KEY is a base64 32-byte key; BOT_KEY is a passphrase stretched once with scrypt.
+if WALLET_AES_KEY or BOT_KEY:
+    # Encryption was asked for; never fall back to storing keys in plaintext
+    if AESGCM is None:
+        logger.error("WALLET_AES_KEY/BOT_KEY is set but the cryptography package is not installed - run: pip install -r requirements.txt")
+        exit(1)
+    if WALLET_AES_KEY:
+        try:
+            aes_key = base64.b64decode(WALLET_AES_KEY, validate=True)
+        except ValueError:
+            aes_key = b''
+        if len(aes_key) != 32:
+            logger.error("WALLET_AES_KEY must be 32 random bytes encoded as base64 (see .env.example)")
+            exit(1)
+    else:
+        aes_key = hashlib.scrypt(BOT_KEY.encode(), salt=b'kuru', n=2**14, r=8, p=1, dklen=32)
+    AEAD = AESGCM(aes_key)
+else:
+    AEAD = None
+    logger.warning("WALLET_AES_KEY/BOT_KEY not set - private keys will be stored unencrypted")
+
+AES_NONCE_SIZE = 12
+
+def seal_private_key(private_key: str):
+    """Encrypt a 0x-prefixed private key for storage as nonce || ciphertext (unchanged when encryption is off)."""
+    if AEAD is None:
+        return private_key
+    nonce = os.urandom(AES_NONCE_SIZE)
+    return nonce + AEAD.encrypt(nonce, bytes.fromhex(private_key[2:]), None)
+
+def open_private_key(stored):
+    """Decrypt a stored private key; legacy plaintext keys pass through.
+    
+    Returns None when the key cannot be opened with the configured WALLET_AES_KEY/BOT_KEY
+    (missing or changed since the wallet was saved), so the wallet row still loads and
+    callers can tell a key mismatch apart from a missing wallet.
+    """
+    if not isinstance(stored, bytes):
+        return stored
+    if AEAD is None:
+        logger.error("Stored private key is encrypted but WALLET_AES_KEY/BOT_KEY is not set")
+        return None
+    try:
+        return '0x' + AEAD.decrypt(stored[:AES_NONCE_SIZE], stored[AES_NONCE_SIZE:], None).hex()
+    except InvalidTag:
+        logger.error("Stored private key does not decrypt with the configured WALLET_AES_KEY/BOT_KEY")
+        return None
+
+def rpc_batch(calls: List[Tuple[str, list]]) -> List:
+    """Send several JSON-RPC calls in one HTTP request and return their results in order."""
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    response = HTTP.post(RPC_URL, data=orjson.dumps(payload), timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+    if isinstance(data, dict):
+        # Providers without batch support answer with a single error object
+        raise ValueError(f"RPC batch rejected: {data.get('error')}")
+    
+    replies = {reply.get('id'): reply for reply in data}
+    results = []
+    for i, (method, _) in enumerate(calls):
+        reply = replies.get(i)
+        if reply is None or 'error' in reply:
+            raise ValueError(f"RPC error in {method}: {reply.get('error') if reply else 'no reply'}")
+        results.append(reply['result'])
+    return results
+
+# Hot-path SQL lives in module constants; sqlite3's per-connection statement cache
+# (keyed by SQL text, 128 entries by default) keeps every one of them prepared
+SQL_CREATE_USER = """
+    INSERT OR IGNORE INTO users (user_id, username)
+    VALUES (?, ?)
+"""
+SQL_COUNT_WALLETS = "SELECT COUNT(*) FROM wallets WHERE user_id = ?"
+SQL_INSERT_WALLET = """
+    INSERT INTO wallets (user_id, wallet_name, wallet_address, private_key, is_active)
+    VALUES (?, ?, ?, ?, ?)
+"""
+SQL_SET_USER_ACTIVE_WALLET = "UPDATE users SET active_wallet_id = ? WHERE user_id = ?"
+SQL_GET_WALLETS = """
+    SELECT id, wallet_name AS name, wallet_address AS address, is_active
+    FROM wallets WHERE user_id = ?
+    ORDER BY created_at ASC, id ASC
+"""
+# Answered entirely from idx_wallets_user_active_cover, no table or users lookup
+SQL_GET_ACTIVE_WALLET = """
+    SELECT id, wallet_name AS name, wallet_address AS address,
+           open_private_key(private_key) AS private_key
+    FROM wallets
+    WHERE user_id = ? AND is_active = 1
+    LIMIT 1
+"""
+# The EXISTS guard replaces a separate ownership SELECT
+SQL_SWITCH_ACTIVE_WALLET = """
+    UPDATE users SET active_wallet_id = ?
+    WHERE user_id = ?
+    AND EXISTS (SELECT 1 FROM wallets WHERE id = ? AND user_id = ?)
+"""
+SQL_FLAG_ACTIVE_WALLET = "UPDATE wallets SET is_active = (id = ?) WHERE user_id = ?"
+SQL_GET_USER = """
+    SELECT u.user_id, u.username, w.wallet_address,
+           open_private_key(w.private_key) AS private_key
+    FROM users u
+    LEFT JOIN wallets w ON u.active_wallet_id = w.id
+    WHERE u.user_id = ?
+"""
+SQL_LOG_TRANSACTION = """
+    INSERT INTO transactions (wallet_id, tx_hash, tx_type, amount, token_address, status)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
 class DatabaseManager:
     def __init__(self, db_path: str = None):
         self.db_path = db_path or DATABASE_PATH
+        # Every query on the shared connection holds this lock, so a write transaction
+        # stays whole and no thread can read another thread's uncommitted statements
+        self._lock = threading.Lock()
+        self.conn = self._connect()
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open the long-lived connection shared by every query."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # Rows are addressable by column name without building a dict per row
+        conn.row_factory = sqlite3.Row
+        # Lets queries decrypt private keys inline so lookups can still return rows
+        conn.create_function("open_private_key", 1, open_private_key, deterministic=True)
+        # WAL lets readers proceed during writes; NORMAL sync is safe with WAL
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
+    
     def init_database(self):
         """Initialize the database with required tables."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
         
         # Create users table (basic user info)
@@ -184,7 +416,7 @@ class DatabaseManager:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user_id INTEGER,
                 wallet_id INTEGER,
-                tx_hash TEXT,
+                tx_hash BLOB,
                 tx_type TEXT,
                 amount TEXT,
                 token_address TEXT,
@@ -198,38 +430,54 @@ class DatabaseManager:
         # Migrate existing data if needed
         self._migrate_existing_data(cursor)
         
+        # Indexes for the per-user lookups (after migration, which may rebuild users)
+        # Covering index for the active-wallet lookup; supersedes the plain (user_id, is_active) one
+        cursor.execute("DROP INDEX IF EXISTS idx_wallets_user_active")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_wallets_user_active_cover
+            ON wallets(user_id, is_active, wallet_name, wallet_address, private_key)
+        """)
+        # A legacy database whose migration failed lacks these columns; skip their
+        # indexes rather than abort startup
+        if 'active_wallet_id' in self._columns(cursor, 'users'):
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_active_wallet ON users(active_wallet_id)")
+        if 'wallet_id' in self._columns(cursor, 'transactions'):
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tx_wallet_id ON transactions(wallet_id, created_at DESC)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tx_hash ON transactions(tx_hash)")
+        
         conn.commit()
-        conn.close()
+    
+    @staticmethod
+    def _columns(cursor, table: str) -> List[str]:
+        """Return the column names of a table."""
+        cursor.execute(f"PRAGMA table_info({table})")
+        return [column[1] for column in cursor.fetchall()]
     
     def _migrate_existing_data(self, cursor):
         """Migrate existing single-wallet data to multi-wallet schema."""
+        # Schema version 1 is the multi-wallet layout; nothing to do once recorded
+        if cursor.execute("PRAGMA user_version").fetchone()[0] >= 1:
+            return
+        
         try:
-            # Check if old schema exists
-            cursor.execute("PRAGMA table_info(users)")
-            columns = [column[1] for column in cursor.fetchall()]
+            # One transaction, so a failure leaves the legacy tables untouched for the next boot
+            cursor.execute("BEGIN")
             
-            if 'wallet_address' in columns:
-                # Migrate existing users to new schema
-                cursor.execute("SELECT user_id, username, wallet_address, private_key FROM users WHERE wallet_address IS NOT NULL")
-                old_users = cursor.fetchall()
-                
-                for user_id, username, wallet_address, private_key in old_users:
-                    # Create wallet entry
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO wallets (user_id, wallet_name, wallet_address, private_key, is_active)
-                        VALUES (?, ?, ?, ?, 1)
-                    """, (user_id, "Main Wallet", wallet_address, private_key))
-                    
-                    # Get wallet ID
-                    cursor.execute("SELECT id FROM wallets WHERE user_id = ? AND wallet_address = ?", (user_id, wallet_address))
-                    wallet_id = cursor.fetchone()[0]
-                    
-                    # Update user with active wallet
-                    cursor.execute("""
-                        UPDATE users SET active_wallet_id = ? WHERE user_id = ?
-                    """, (wallet_id, user_id))
+            if 'wallet_address' in self._columns(cursor, 'users'):
+                # Create a main wallet for every legacy user in one statement
+                # (skipping any a previous partial run already copied)
+                cursor.execute("""
+                    INSERT INTO wallets (user_id, wallet_name, wallet_address, private_key, is_active)
+                    SELECT u.user_id, 'Main Wallet', u.wallet_address, u.private_key, 1
+                    FROM users u
+                    WHERE u.wallet_address IS NOT NULL AND NOT EXISTS (
+                        SELECT 1 FROM wallets w
+                        WHERE w.user_id = u.user_id AND w.wallet_address = u.wallet_address
+                    )
+                """)
                 
-                # Remove old columns (SQLite doesn't support DROP COLUMN, so we recreate)
+                # Remove old columns (SQLite doesn't support DROP COLUMN, so we recreate),
+                # pointing each user at their main wallet on the way
                 cursor.execute("""
                     CREATE TABLE users_new (
                         user_id INTEGER PRIMARY KEY,
@@ -241,196 +489,218 @@ class DatabaseManager:
                 
                 cursor.execute("""
                     INSERT INTO users_new (user_id, username, active_wallet_id, created_at)
-                    SELECT user_id, username, active_wallet_id, created_at FROM users
+                    SELECT u.user_id, u.username, (
+                        SELECT MAX(w.id) FROM wallets w
+                        WHERE w.user_id = u.user_id AND w.wallet_address = u.wallet_address
+                    ), u.created_at
+                    FROM users u
                 """)
                 
                 cursor.execute("DROP TABLE users")
                 cursor.execute("ALTER TABLE users_new RENAME TO users")
-                
+            
+            if 'wallet_id' not in self._columns(cursor, 'transactions'):
+                # Legacy transactions belonged to the user's only wallet
+                cursor.execute("ALTER TABLE transactions ADD COLUMN wallet_id INTEGER REFERENCES wallets (id)")
+                cursor.execute("""
+                    UPDATE transactions SET wallet_id = (
+                        SELECT u.active_wallet_id FROM users u WHERE u.user_id = transactions.user_id
+                    )
+                """)
+            
+            cursor.execute("PRAGMA user_version = 1")
+            self.conn.commit()
         except Exception as e:
+            self.conn.rollback()
             logger.error(f"Error migrating data: {e}")
     
     def create_user(self, user_id: int, username: str) -> bool:
         """Create a new user."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT OR IGNORE INTO users (user_id, username)
-                VALUES (?, ?)
-            """, (user_id, username))
-            
-            conn.commit()
-            conn.close()
-            return True
-        except Exception as e:
-            logger.error(f"Error creating user: {e}")
-            return False
+        with self._lock:
+            try:
+                conn = self.conn
+                cursor = conn.cursor()
+                
+                cursor.execute(SQL_CREATE_USER, (user_id, username))
+                
+                conn.commit()
+                return True
+            except Exception as e:
+                self.conn.rollback()
+                logger.error(f"Error creating user: {e}")
+                return False
     
     def create_wallet(self, user_id: int, wallet_name: str, wallet_address: str, private_key: str) -> bool:
         """Create a new wallet for a user."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Deactivate other wallets if this is the first one
-            cursor.execute("SELECT COUNT(*) FROM wallets WHERE user_id = ?", (user_id,))
-            wallet_count = cursor.fetchone()[0]
-            is_active = wallet_count == 0
-            
-            cursor.execute("""
-                INSERT INTO wallets (user_id, wallet_name, wallet_address, private_key, is_active)
-                VALUES (?, ?, ?, ?, ?)
-            """, (user_id, wallet_name, wallet_address, private_key, is_active))
-            
-            wallet_id = cursor.lastrowid
-            
-            # Set as active wallet if it's the first one
-            if is_active:
-                cursor.execute("""
-                    UPDATE users SET active_wallet_id = ? WHERE user_id = ?
-                """, (wallet_id, user_id))
-            
-            conn.commit()
-            conn.close()
-            return True
-        except Exception as e:
-            logger.error(f"Error creating wallet: {e}")
-            return False
+        with self._lock:
+            try:
+                conn = self.conn
+                cursor = conn.cursor()
+                
+                # Deactivate other wallets if this is the first one
+                cursor.execute(SQL_COUNT_WALLETS, (user_id,))
+                wallet_count = cursor.fetchone()[0]
+                is_active = wallet_count == 0
+                
+                cursor.execute(SQL_INSERT_WALLET, (user_id, wallet_name, wallet_address, seal_private_key(private_key), is_active))
+                
+                wallet_id = cursor.lastrowid
+                
+                # Set as active wallet if it's the first one
+                if is_active:
+                    cursor.execute(SQL_SET_USER_ACTIVE_WALLET, (wallet_id, user_id))
+                
+                conn.commit()
+                return True
+            except Exception as e:
+                self.conn.rollback()
+                logger.error(f"Error creating wallet: {e}")
+                return False
     
-    def get_user_wallets(self, user_id: int) -> List[Dict]:
+    def get_user_wallets(self, user_id: int) -> List[sqlite3.Row]:
         """Get all wallets for a user."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT id, wallet_name, wallet_address, is_active
-                FROM wallets WHERE user_id = ?
-                ORDER BY created_at ASC
-            """, (user_id,))
-            
-            results = cursor.fetchall()
-            conn.close()
-            
-            return [{
-                'id': result[0],
-                'name': result[1],
-                'address': result[2],
-                'is_active': bool(result[3])
-            } for result in results]
-        except Exception as e:
-            logger.error(f"Error getting user wallets: {e}")
-            return []
+        with self._lock:
+            try:
+                conn = self.conn
+                cursor = conn.cursor()
+                
+                cursor.execute(SQL_GET_WALLETS, (user_id,))
+                
+                return cursor.fetchall()
+            except Exception as e:
+                logger.error(f"Error getting user wallets: {e}")
+                return []
     
-    def get_active_wallet(self, user_id: int) -> Optional[Dict]:
+    def get_active_wallet(self, user_id: int) -> Optional[sqlite3.Row]:
         """Get the active wallet for a user."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT w.id, w.wallet_name, w.wallet_address, w.private_key
-                FROM wallets w
-                JOIN users u ON w.id = u.active_wallet_id
-                WHERE u.user_id = ?
-            """, (user_id,))
-            
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return {
-                    'id': result[0],
-                    'name': result[1],
-                    'address': result[2],
-                    'private_key': result[3]
-                }
-            return None
-        except Exception as e:
-            logger.error(f"Error getting active wallet: {e}")
-            return None
+        with self._lock:
+            try:
+                conn = self.conn
+                cursor = conn.cursor()
+                
+                cursor.execute(SQL_GET_ACTIVE_WALLET, (user_id,))
+                
+                return cursor.fetchone()
+            except Exception as e:
+                logger.error(f"Error getting active wallet: {e}")
+                return None
     
     def set_active_wallet(self, user_id: int, wallet_id: int) -> bool:
         """Set the active wallet for a user."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Verify wallet belongs to user
-            cursor.execute("SELECT id FROM wallets WHERE id = ? AND user_id = ?", (wallet_id, user_id))
-            if not cursor.fetchone():
+        with self._lock:
+            try:
+                with self.conn as conn:
+                    cursor = conn.execute(SQL_SWITCH_ACTIVE_WALLET, (wallet_id, user_id, wallet_id, user_id))
+                    if cursor.rowcount == 0:
+                        return False
+                    
+                    conn.execute(SQL_FLAG_ACTIVE_WALLET, (wallet_id, user_id))
+                return True
+            except Exception as e:
+                logger.error(f"Error setting active wallet: {e}")
                 return False
-            
-            # Update active wallet
-            cursor.execute("""
-                UPDATE users SET active_wallet_id = ? WHERE user_id = ?
-            """, (wallet_id, user_id))
-            
-            # Update wallet active status
-            cursor.execute("UPDATE wallets SET is_active = 0 WHERE user_id = ?", (user_id,))
-            cursor.execute("UPDATE wallets SET is_active = 1 WHERE id = ?", (wallet_id,))
-            
-            conn.commit()
-            conn.close()
-            return True
-        except Exception as e:
-            logger.error(f"Error setting active wallet: {e}")
-            return False
     
-    def get_user(self, user_id: int) -> Optional[Dict]:
+    def get_user(self, user_id: int) -> Optional[sqlite3.Row]:
         """Get user information with active wallet."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT u.user_id, u.username, w.wallet_address, w.private_key
-                FROM users u
-                LEFT JOIN wallets w ON u.active_wallet_id = w.id
-                WHERE u.user_id = ?
-            """, (user_id,))
-            
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return {
-                    'user_id': result[0],
-                    'username': result[1],
-                    'wallet_address': result[2],
-                    'private_key': result[3]
-                }
-            return None
-        except Exception as e:
-            logger.error(f"Error getting user: {e}")
-            return None
+        with self._lock:
+            try:
+                conn = self.conn
+                cursor = conn.cursor()
+                
+                cursor.execute(SQL_GET_USER, (user_id,))
+                
+                return cursor.fetchone()
+            except Exception as e:
+                logger.error(f"Error getting user: {e}")
+                return None
     
-    def log_transaction(self, wallet_id: int, tx_hash: str, tx_type: str, amount: str, token_address: str, status: str):
-        """Log a transaction."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO transactions (wallet_id, tx_hash, tx_type, amount, token_address, status)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (wallet_id, tx_hash, tx_type, amount, token_address, status))
-            
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            logger.error(f"Error logging transaction: {e}")
+    def log_transaction(self, wallet_id: int, tx_hash: bytes, tx_type: str, amount: str, token_address: str, status: str):
+        """Log a transaction (tx_hash is stored as its raw 32 bytes)."""
+        with self._lock:
+            try:
+                conn = self.conn
+                cursor = conn.cursor()
+                
+                cursor.execute(SQL_LOG_TRANSACTION, (wallet_id, tx_hash, tx_type, amount, token_address, status))
+                
+                conn.commit()
+            except Exception as e:
+                self.conn.rollback()
+                logger.error(f"Error logging transaction: {e}")
 
 class KuruSwapBot:
     def __init__(self):
         self.db = DatabaseManager()
+        self.token_cache = self._load_token_cache()
+        self._token_cache_lock = threading.Lock()  # lookups run on worker threads
+        # Kept in insertion order so the oldest entries sit at the front; only touched on the event loop
+        self.pool_cache: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self.balance_cache: Dict[str, Tuple[float, float]] = {}  # address -> (balance, monotonic time fetched)
+        self._gas_price: Tuple[int, float] = (0, 0.0)  # (wei, monotonic time fetched)
+        self._http_session: Optional[aiohttp.ClientSession] = None
+    
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """Return the shared aiohttp session (must be called from the event loop)."""
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession(
+                headers={
+                    "User-Agent": USER_AGENT,
+                    "Content-Type": "application/json",
+                    "Accept-Encoding": "gzip, deflate"
+                },
+                timeout=aiohttp.ClientTimeout(total=10, connect=3),
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60)
+            )
+        return self._http_session
+    
+    async def close(self):
+        """Close the shared aiohttp session."""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+    
+    def _load_token_cache(self) -> "OrderedDict[str, Dict]":
+        """Load cached token metadata from disk, dropping expired entries."""
+        try:
+            with open(TOKEN_CACHE_PATH, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return OrderedDict()
+        
+        # Oldest first so the LRU evicts stale tokens before fresh ones
+        now = time.time()
+        fresh = sorted(
+            (entry.get('cached_at', 0), address) for address, entry in entries.items()
+            if now - entry.get('cached_at', 0) < TOKEN_CACHE_TTL
+        )
+        return OrderedDict((address, entries[address]) for _, address in fresh[-TOKEN_CACHE_MAX:])
+    
+    def _save_token_cache(self):
+        """Persist the token metadata cache atomically."""
+        try:
+            tmp_path = f"{TOKEN_CACHE_PATH}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.token_cache, f)
+            os.replace(tmp_path, TOKEN_CACHE_PATH)
+        except OSError as e:
+            logger.warning(f"Could not save token cache: {e}")
     
     def create_wallet(self) -> Tuple[str, str]:
         """Create a new wallet and return address and private key."""
-        account = Account.create()
-        return account.address, account.key.hex()
+        if coincurve is None:
+            account = Account.create()
+            return account.address, account.key.hex()
+        
+        # Derive the address straight from libsecp256k1, skipping LocalAccount
+        while True:
+            private_key = os.urandom(32)
+            try:
+                public_key = coincurve.PublicKey.from_valid_secret(private_key).format(compressed=False)[1:]
+                break
+            except ValueError:
+                # Secret outside the curve order; astronomically rare, draw again
+                continue
+        address = to_checksum_address(keccak(public_key)[-20:])
+        return address, '0x' + private_key.hex()
     
     def get_mon_balance(self, address: str) -> float:
         """Get MON balance for an address."""
@@ -439,78 +709,180 @@ class KuruSwapBot:
                 logger.error("Web3 not available for balance check")
                 return 0.0
             
+            address = cs(address)
+            now = time.monotonic()
+            cached = self.balance_cache.get(address)
+            if cached is not None and now - cached[1] < BALANCE_CACHE_TTL:
+                return cached[0]
+            
             balance_wei = w3.eth.get_balance(address)
-            return float(w3.from_wei(balance_wei, 'ether'))
+            balance = float(w3.from_wei(balance_wei, 'ether'))
+            self.balance_cache[address] = (balance, now)
+            return balance
         except Exception as e:
             logger.error(f"Error getting MON balance: {e}")
             return 0.0
     
+    def invalidate_balance(self, address: str):
+        """Forget the cached balance of an address, e.g. after it sent a transaction."""
+        self.balance_cache.pop(cs(address), None)
+    
+    def get_mon_balances_bulk(self, addresses: List[str]) -> Dict[str, float]:
+        """Get MON balances for several addresses in one batched RPC request."""
+        if not addresses:
+            return {}
+        try:
+            results = rpc_batch([("eth_getBalance", [address, "latest"]) for address in addresses])
+            return {
+                address: int(result, 16) / 10**18
+                for address, result in zip(addresses, results)
+            }
+        except Exception as e:
+            logger.error(f"Error getting MON balances: {e}")
+            return {}
+    
+    def _fetch_token_metadata(self, token_addresses: List[str]) -> Dict[str, Tuple[str, str, int]]:
+        """Read name, symbol and decimals for several tokens in one Multicall3 call."""
+        selectors = (NAME_SELECTOR, SYMBOL_SELECTOR, DECIMALS_SELECTOR)
+        try:
+            calls = [
+                (address, True, Web3.to_bytes(hexstr=selector))
+                for address in token_addresses for selector in selectors
+            ]
+            result = w3.eth.call({
+                'to': MULTICALL3_ADDRESS,
+                'data': Web3.to_hex(AGGREGATE3_SELECTOR + abi_encode(['(address,bool,bytes)[]'], [calls]))
+            })
+            replies = [
+                return_data if success else None
+                for success, return_data in abi_decode(['(bool,bytes)[]'], result)[0]
+            ]
+        except Exception as e:
+            # No Multicall3 on this chain or the aggregate reverted; batch plain eth_calls per token
+            logger.warning(f"Multicall3 lookup failed, falling back to per-token calls: {e}")
+            replies = []
+            for address in token_addresses:
+                try:
+                    replies.extend(Web3.to_bytes(hexstr=data) for data in rpc_batch([
+                        ("eth_call", [{"to": address, "data": selector}, "latest"])
+                        for selector in selectors
+                    ]))
+                except Exception as e:
+                    logger.error(f"Error getting token info for {address}: {e}")
+                    replies.extend([None] * len(selectors))
+        
+        metadata = {}
+        for i, address in enumerate(token_addresses):
+            name_data, symbol_data, decimals_data = replies[i * 3:i * 3 + 3]
+            try:
+                metadata[address] = (
+                    abi_decode(['string'], name_data)[0],
+                    abi_decode(['string'], symbol_data)[0],
+                    abi_decode(['uint8'], decimals_data)[0]
+                )
+            except Exception:
+                # Reverted or not an ERC20 (e.g. empty return data from an EOA)
+                continue
+        return metadata
+    
+    def get_tokens_info(self, token_addresses: List[str]) -> Dict[str, Dict]:
+        """Get token information for several tokens, fetching all uncached ones together."""
+        tokens = {}
+        missing = []
+        now = time.time()
+        with self._token_cache_lock:
+            for token_address in token_addresses:
+                if not _ADDR_RE.fullmatch(token_address):
+                    continue
+                token_address = cs(token_address)
+                cached = self.token_cache.get(token_address)
+                if cached and now - cached['cached_at'] < TOKEN_CACHE_TTL:
+                    self.token_cache.move_to_end(token_address)
+                    tokens[token_address] = {
+                        'name': cached['name'],
+                        'symbol': cached['symbol'],
+                        'decimals': cached['decimals'],
+                        'address': token_address
+                    }
+                elif token_address not in missing:
+                    missing.append(token_address)
+        
+        if not missing:
+            return tokens
+        
+        if not ensure_web3_connected():
+            logger.error("Web3 not available for token info")
+            return tokens
+        
+        metadata = self._fetch_token_metadata(missing)
+        if not metadata:
+            return tokens
+        
+        with self._token_cache_lock:
+            for token_address, (name, symbol, decimals) in metadata.items():
+                self.token_cache[token_address] = {
+                    'name': name,
+                    'symbol': symbol,
+                    'decimals': int(decimals),
+                    'cached_at': time.time()
+                }
+                self.token_cache.move_to_end(token_address)
+                tokens[token_address] = {
+                    'name': name,
+                    'symbol': symbol,
+                    'decimals': decimals,
+                    'address': token_address
+                }
+            while len(self.token_cache) > TOKEN_CACHE_MAX:
+                self.token_cache.popitem(last=False)
+            self._save_token_cache()
+        
+        return tokens
+    
     def get_token_info(self, token_address: str) -> Optional[Dict]:
         """Get token information (name, symbol, decimals)."""
         try:
-            if not ensure_web3_connected():
-                logger.error("Web3 not available for token info")
+            if not _ADDR_RE.fullmatch(token_address):
                 return None
-                
-            if not w3.is_address(token_address):
-                return None
-            
-            contract = w3.eth.contract(address=token_address, abi=ERC20_ABI)
-            name = contract.functions.name().call()
-            symbol = contract.functions.symbol().call()
-            decimals = contract.functions.decimals().call()
-            
-            return {
-                'name': name,
-                'symbol': symbol,
-                'decimals': decimals,
-                'address': token_address
-            }
+            return self.get_tokens_info([token_address]).get(cs(token_address))
         except Exception as e:
             logger.error(f"Error getting token info: {e}")
             return None
     
-    def filter_market_pools(self, base_token: str, quote_token: str) -> Optional[str]:
+    def _cache_pool(self, cache_key: Tuple[str, str], market: str):
+        """Store a pool, dropping expired entries and the oldest beyond POOL_CACHE_MAX."""
+        now = time.monotonic()
+        self.pool_cache[cache_key] = (market, now)
+        while self.pool_cache:
+            _, (_, stored) = next(iter(self.pool_cache.items()))
+            if len(self.pool_cache) <= POOL_CACHE_MAX and now - stored < POOL_CACHE_TTL:
+                break
+            self.pool_cache.popitem(last=False)
+    
+    async def filter_market_pools(self, base_token: str, quote_token: str) -> Optional[str]:
         """Find market pool for token pair."""
+        cache_key = (base_token.lower(), quote_token.lower())
+        cached = self.pool_cache.get(cache_key)
+        if cached:
+            if time.monotonic() - cached[1] < POOL_CACHE_TTL:
+                return cached[0]
+            del self.pool_cache[cache_key]
+        
         try:
-            pairs = [{
-                "baseToken": base_token,
-                "quoteToken": quote_token
-            }]
-            
-            response = requests.post(
-                "https://api.testnet.kuru.io/api/v1/markets/filtered",
-                json={"pairs": pairs},
-                headers={
-                    "Content-Type": "application/json",
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('data') and len(data['data']) > 0:
-                    return data['data'][0]['market']
-            
-            # Try inverted pair
-            pairs = [{
-                "baseToken": quote_token,
-                "quoteToken": base_token
-            }]
-            
-            response = requests.post(
-                "https://api.testnet.kuru.io/api/v1/markets/filtered",
-                json={"pairs": pairs},
-                headers={
-                    "Content-Type": "application/json",
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-            )
+            session = self._get_http_session()
             
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('data') and len(data['data']) > 0:
-                    return data['data'][0]['market']
+            # Try the pair as given, then inverted
+            for base, quote in ((base_token, quote_token), (quote_token, base_token)):
+                async with session.post(
+                    f"{KURU_API_URL}/api/v1/markets/filtered",
+                    data=orjson.dumps({"pairs": [{"baseToken": base, "quoteToken": quote}]})
+                ) as response:
+                    if response.status == 200:
+                        data = orjson.loads(await response.read())
+                        if data.get('data') and len(data['data']) > 0:
+                            market = data['data'][0]['market']
+                            self._cache_pool(cache_key, market)
+                            return market
             
             return None
         except Exception as e:
@@ -520,40 +892,31 @@ class KuruSwapBot:
     def calculate_swap_output(self, pool_address: str, is_buy: bool) -> Optional[int]:
         """Calculate expected swap output."""
         try:
-            kuru_utils = w3.eth.contract(address=KURU_UTILS_ADDRESS, abi=KURU_UTILS_ABI)
-            price = kuru_utils.functions.calculatePriceOverRoute([pool_address], [is_buy]).call()
-            return price
+            data = CALCULATE_PRICE_SELECTOR + abi_encode(CALCULATE_PRICE_TYPES, ([pool_address], [is_buy]))
+            result = w3.eth.call({'to': KURU_UTILS_ADDRESS, 'data': Web3.to_hex(data)})
+            return abi_decode(['uint256'], result)[0]
         except Exception as e:
             logger.error(f"Error calculating swap output: {e}")
             return None
     
-    def perform_swap(self, private_key: str, token_address: str, amount_mon: float) -> Optional[str]:
-        """Perform the actual swap transaction."""
+    def perform_swap(self, private_key: str, token_address: str, amount_mon: float, pool_address: str) -> Optional[bytes]:
+        """Perform the swap through the given market pool and return the raw tx hash."""
         try:
+            started = time.perf_counter()
             account = Account.from_key(private_key)
             
-            # Find pool
-            pool_address = self.filter_market_pools(MON_ADDRESS, token_address)
-            if not pool_address:
-                return None
-            
             # Calculate expected output
             price = self.calculate_swap_output(pool_address, False)  # MON -> TOKEN
             if not price:
                 return None
+            quoted = time.perf_counter()
             
             amount_wei = w3.to_wei(amount_mon, 'ether')
             expected_out = (amount_wei * price) // (10**18)
             min_amount_out = (expected_out * 85) // 100  # 15% slippage
             
-            # Prepare transaction
-            router = w3.eth.contract(address=ROUTER_ADDRESS, abi=ROUTER_ABI)
-            
-            # Get gas price
-            gas_price = w3.eth.gas_price
-            
-            # Build transaction
-            transaction = router.functions.anyToAnySwap(
+            # Build calldata
+            data = ANY_TO_ANY_SWAP_SELECTOR + abi_encode(ANY_TO_ANY_SWAP_TYPES, (
                 [pool_address],  # market addresses
                 [True],          # is buy
                 [True],          # native send
@@ -561,19 +924,53 @@ class KuruSwapBot:
                 token_address,   # credit token
                 amount_wei,      # amount
                 min_amount_out   # min amount out
-            ).build_transaction({
-                'from': account.address,
+            ))
+            
+            # Nonce, gas estimate and (unless recently seen) gas price in one round trip
+            calls = [
+                ("eth_getTransactionCount", [account.address, "pending"]),
+                ("eth_estimateGas", [{
+                    'from': account.address,
+                    'to': ROUTER_ADDRESS,
+                    'value': hex(amount_wei),
+                    'data': Web3.to_hex(data)
+                }])
+            ]
+            gas_price, fetched = self._gas_price
+            if time.monotonic() - fetched >= GAS_PRICE_TTL:
+                calls.append(("eth_gasPrice", []))
+            results = [int(result, 16) for result in rpc_batch(calls)]
+            nonce, gas_estimate = results[:2]
+            if len(results) > 2:
+                gas_price = results[2]
+                self._gas_price = (gas_price, time.monotonic())
+            
+            prepared = time.perf_counter()
+            
+            # Build transaction
+            transaction = {
+                'chainId': CHAIN_ID,
+                'to': ROUTER_ADDRESS,
                 'value': amount_wei,
-                'gas': 250000,
+                'gas': gas_estimate * 12 // 10,  # 20% headroom over the estimate
                 'gasPrice': gas_price,
-                'nonce': w3.eth.get_transaction_count(account.address)
-            })
+                'nonce': nonce,
+                'data': data
+            }
             
             # Sign and send transaction
-            signed_txn = w3.eth.account.sign_transaction(transaction, private_key)
+            signed_txn = account.sign_transaction(transaction)
+            signed = time.perf_counter()
             tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            sent = time.perf_counter()
             
-            return tx_hash.hex()
+            logger.info(
+                f"Swap timings: quote {(quoted - started) * 1000:.0f}ms, "
+                f"gas/nonce {(prepared - quoted) * 1000:.0f}ms, "
+                f"sign {(signed - prepared) * 1000:.0f}ms, "
+                f"send {(sent - signed) * 1000:.0f}ms"
+            )
+            return bytes(tx_hash)
         except Exception as e:
             logger.error(f"Error performing swap: {e}")
             return None
@@ -581,58 +978,93 @@ class KuruSwapBot:
 # Initialize bot
 kuru_bot = KuruSwapBot()
 
-# Helper functions for keyboards
-def get_main_keyboard():
-    keyboard = [
-        [InlineKeyboardButton("🔐 Create Wallet", callback_data="create_wallet")],
-        [InlineKeyboardButton("📥 Import Wallet", callback_data="import_wallet")],
-        [InlineKeyboardButton("👛 Manage Wallets", callback_data="manage_wallets")],
-        [InlineKeyboardButton("💰 Check Balance", callback_data="check_balance")],
-        [InlineKeyboardButton("🔄 Swap Tokens", callback_data="start_swap")],
-        [InlineKeyboardButton("📊 Transaction History", callback_data="tx_history")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+# Thread pool for the blocking web3/requests calls, so they don't stall the event loop
+EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="kuru-rpc")
 
-def get_back_to_menu_keyboard():
-    keyboard = [
-        [InlineKeyboardButton("🏠 Back to Menu", callback_data="back_to_menu")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+async def _run(fn, *args):
+    """Run a blocking function on EXECUTOR and await its result."""
+    return await asyncio.get_running_loop().run_in_executor(EXECUTOR, fn, *args)
 
-def get_cancel_keyboard():
-    keyboard = [
-        [InlineKeyboardButton("❌ Cancel", callback_data="cancel")],
-        [InlineKeyboardButton("🏠 Back to Menu", callback_data="back_to_menu")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+# Messages a user sends within this window of each other are collapsed into the last one
+BATCH_WINDOW = 0.15
 
-# Bot command handlers
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Start command handler."""
-    user = update.effective_user
+def debounced(handler):
+    """Run a text handler once per quick burst from one user, on the latest message.
     
-    reply_markup = get_main_keyboard()
-    
-    welcome_text = f"""
-🚀 **Welcome to KuruSwap Bot!** 🚀
+    Register the result with block=False and add collect_burst under
+    ConversationHandler.WAITING, which receives the messages sent meanwhile.
+    """
+    @wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        context.user_data['debounce_latest'] = update
+        await asyncio.sleep(BATCH_WINDOW)
+        return await handler(context.user_data.pop('debounce_latest', update), context)
+    return wrapper
+
+async def collect_burst(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Remember a message that arrived while a debounced handler was waiting."""
+    context.user_data['debounce_latest'] = update
+
+# Helper functions for keyboards
+# Static keyboards and rows are built once and reused by every handler
+BACK_TO_MENU_ROW = [InlineKeyboardButton("🏠 Back to Menu", callback_data="back_to_menu")]
+BACK_TO_WALLETS_ROW = [InlineKeyboardButton("👛 Back to Wallets", callback_data="manage_wallets")]
+CANCEL_SWAP_ROW = [InlineKeyboardButton("❌ Cancel", callback_data="cancel_swap")]
+
+MAIN_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔐 Create Wallet", callback_data="create_wallet")],
+    [InlineKeyboardButton("📥 Import Wallet", callback_data="import_wallet")],
+    [InlineKeyboardButton("👛 Manage Wallets", callback_data="manage_wallets")],
+    [InlineKeyboardButton("💰 Check Balance", callback_data="check_balance")],
+    [InlineKeyboardButton("🔄 Swap Tokens", callback_data="start_swap")],
+    [InlineKeyboardButton("📊 Transaction History", callback_data="tx_history")]
+])
 
-Hello {user.first_name}! I'm your personal KuruSwap assistant on Monad Testnet.
+BACK_TO_MENU_KEYBOARD = InlineKeyboardMarkup([BACK_TO_MENU_ROW])
 
-**What I can do:**
+CANCEL_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("❌ Cancel", callback_data="cancel")],
+    BACK_TO_MENU_ROW
+])
+
+def confirm_swap_keyboard(amount: float) -> InlineKeyboardMarkup:
+    """Build the swap confirmation keyboard; only the confirm button varies."""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("✅ Confirm Swap", callback_data=f"confirm_swap_{amount}")],
+        CANCEL_SWAP_ROW,
+        BACK_TO_MENU_ROW
+    ])
+
+# Welcome message, rendered once as HTML; only the user's name is filled in
+WELCOME_TEXT = """
+🚀 <b>Welcome to KuruSwap Bot!</b> 🚀
+
+Hello {first_name}! I'm your personal KuruSwap assistant on Monad Testnet.
+
+<b>What I can do:</b>
 • Create secure wallets for you
 • Check your MON balance
 • Swap MON tokens to any valid token address
 • Track your transaction history
 
-**Getting Started:**
+<b>Getting Started:</b>
 1. Create a wallet first
 2. Deposit some MON tokens
 3. Start swapping!
 
-⚠️ **Important:** This bot operates on Monad Testnet. Use only testnet tokens!
-    """
+⚠️ <b>Important:</b> This bot operates on Monad Testnet. Use only testnet tokens!
+"""
+
+def welcome_text(first_name: str) -> str:
+    """Fill the welcome template with an HTML-escaped first name."""
+    return WELCOME_TEXT.format(first_name=html.escape(first_name or ""))
+
+# Bot command handlers
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Start command handler."""
+    user = update.effective_user
     
-    await update.message.reply_text(welcome_text, reply_markup=reply_markup, parse_mode='Markdown')
+    await update.message.reply_text(welcome_text(user.first_name), reply_markup=MAIN_KEYBOARD)
 
 async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle button callbacks."""
@@ -678,11 +1110,10 @@ async def create_wallet_handler(query, context):
     context.user_data['action'] = 'create'
     
     await query.edit_message_text(
-        "🔐 **Create New Wallet**\n\n"
+        "🔐 <b>Create New Wallet</b>\n\n"
         "Please send a name for your new wallet.\n\n"
-        "Examples: `Main Wallet`, `Trading Wallet`, `Savings`",
-        reply_markup=get_cancel_keyboard(),
-        parse_mode='Markdown'
+        "Examples: <code>Main Wallet</code>, <code>Trading Wallet</code>, <code>Savings</code>",
+        reply_markup=CANCEL_KEYBOARD
     )
     
     return AWAITING_WALLET_NAME
@@ -701,11 +1132,10 @@ async def import_wallet_handler(query, context):
     context.user_data['username'] = username
     
     await query.edit_message_text(
-        "📥 **Import Existing Wallet**\n\n"
+        "📥 <b>Import Existing Wallet</b>\n\n"
         "Please send a name for your imported wallet.\n\n"
-        "Examples: `Imported Wallet`, `MetaMask Wallet`, `Hardware Wallet`",
-        reply_markup=get_cancel_keyboard(),
-        parse_mode='Markdown'
+        "Examples: <code>Imported Wallet</code>, <code>MetaMask Wallet</code>, <code>Hardware Wallet</code>",
+        reply_markup=CANCEL_KEYBOARD
     )
     
     return AWAITING_WALLET_NAME
@@ -717,26 +1147,33 @@ async def manage_wallets_handler(query, context):
     wallets = kuru_bot.db.get_user_wallets(user_id)
     if not wallets:
         await query.edit_message_text(
-            "👛 **No wallets found!**\n\n"
+            "👛 <b>No wallets found!</b>\n\n"
             "Create or import a wallet first.",
-            reply_markup=get_back_to_menu_keyboard()
+            reply_markup=BACK_TO_MENU_KEYBOARD
         )
         return
     
+    # One RPC round trip for every wallet's balance
+    balances = await _run(kuru_bot.get_mon_balances_bulk, [wallet['address'] for wallet in wallets])
+    
     keyboard = []
     for wallet in wallets:
         status = "🟢 Active" if wallet['is_active'] else "⚪ Inactive"
+        label = f"{status} {wallet['name']}"
+        balance = balances.get(wallet['address'])
+        if balance is not None:
+            label += f" · {balance:.4f} MON"
         keyboard.append([
             InlineKeyboardButton(
-                f"{status} {wallet['name']}", 
+                label, 
                 callback_data=f"select_wallet_{wallet['id']}"
             )
         ])
     
-    keyboard.append([InlineKeyboardButton("🏠 Back to Menu", callback_data="back_to_menu")])
+    keyboard.append(BACK_TO_MENU_ROW)
     
     await query.edit_message_text(
-        "👛 **Your Wallets**\n\n"
+        "👛 <b>Your Wallets</b>\n\n"
         "Select a wallet to view details or switch to it:",
         reply_markup=InlineKeyboardMarkup(keyboard)
     )
@@ -750,14 +1187,14 @@ async def select_wallet_handler(query, context, wallet_id):
     
     if not selected_wallet:
         await query.edit_message_text(
-            "❌ **Wallet not found!**",
-            reply_markup=get_back_to_menu_keyboard()
+            "❌ <b>Wallet not found!</b>",
+            reply_markup=BACK_TO_MENU_KEYBOARD
         )
         return
     
     try:
-        balance = kuru_bot.get_mon_balance(selected_wallet['address'])
-        status = "🟢 **Active Wallet**" if selected_wallet['is_active'] else "⚪ Inactive"
+        balance = await _run(kuru_bot.get_mon_balance, selected_wallet['address'])
+        status = "🟢 <b>Active Wallet</b>" if selected_wallet['is_active'] else "⚪ Inactive"
         
         keyboard = []
         if not selected_wallet['is_active']:
@@ -766,25 +1203,21 @@ async def select_wallet_handler(query, context, wallet_id):
                 callback_data=f"switch_wallet_{wallet_id}"
             )])
         
-        keyboard.extend([
-            [InlineKeyboardButton("👛 Back to Wallets", callback_data="manage_wallets")],
-            [InlineKeyboardButton("🏠 Back to Menu", callback_data="back_to_menu")]
-        ])
+        keyboard.extend([BACK_TO_WALLETS_ROW, BACK_TO_MENU_ROW])
         
         await query.edit_message_text(
-            f"👛 **{selected_wallet['name']}**\n\n"
+            f"👛 <b>{html.escape(selected_wallet['name'])}</b>\n\n"
             f"{status}\n\n"
-            f"**Address:** `{selected_wallet['address']}`\n"
-            f"**Balance:** `{balance:.6f} MON`\n\n"
-            f"🔗 [View on Explorer](https://testnet.monadexplorer.com/address/{selected_wallet['address']})",
-            reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode='Markdown'
+            f"<b>Address:</b> <code>{selected_wallet['address']}</code>\n"
+            f"<b>Balance:</b> <code>{balance:.6f} MON</code>\n\n"
+            f"🔗 <a href='https://testnet.monadexplorer.com/address/{selected_wallet['address']}'>View on Explorer</a>",
+            reply_markup=InlineKeyboardMarkup(keyboard)
         )
     except Exception as e:
         logger.error(f"Error in select_wallet_handler: {e}")
         await query.edit_message_text(
-            "❌ **Error loading wallet details.**",
-            reply_markup=get_back_to_menu_keyboard()
+            "❌ <b>Error loading wallet details.</b>",
+            reply_markup=BACK_TO_MENU_KEYBOARD
         )
 
 async def switch_wallet_handler(query, context, wallet_id):
@@ -797,16 +1230,15 @@ async def switch_wallet_handler(query, context, wallet_id):
         switched_wallet = next((w for w in wallets if w['id'] == wallet_id), None)
         
         await query.edit_message_text(
-            f"✅ **Wallet switched successfully!**\n\n"
-            f"Active wallet is now: **{switched_wallet['name']}**\n\n"
-            f"**Address:** `{switched_wallet['address']}`",
-            reply_markup=get_back_to_menu_keyboard(),
-            parse_mode='Markdown'
+            f"✅ <b>Wallet switched successfully!</b>\n\n"
+            f"Active wallet is now: <b>{html.escape(switched_wallet['name'])}</b>\n\n"
+            f"<b>Address:</b> <code>{switched_wallet['address']}</code>",
+            reply_markup=BACK_TO_MENU_KEYBOARD
         )
     else:
         await query.edit_message_text(
-            "❌ **Error switching wallet.**",
-            reply_markup=get_back_to_menu_keyboard()
+            "❌ <b>Error switching wallet.</b>",
+            reply_markup=BACK_TO_MENU_KEYBOARD
         )
 
 async def check_balance_handler(query, context):
@@ -816,27 +1248,26 @@ async def check_balance_handler(query, context):
     active_wallet = kuru_bot.db.get_active_wallet(user_id)
     if not active_wallet:
         await query.edit_message_text(
-            "❌ **No active wallet found!** Please create a wallet first.",
-            reply_markup=get_back_to_menu_keyboard()
+            "❌ <b>No active wallet found!</b> Please create a wallet first.",
+            reply_markup=BACK_TO_MENU_KEYBOARD
         )
         return
     
     try:
-        balance = kuru_bot.get_mon_balance(active_wallet['address'])
+        balance = await _run(kuru_bot.get_mon_balance, active_wallet['address'])
         
         await query.edit_message_text(
-            f"💰 **Balance - {active_wallet['name']}**\n\n"
-            f"**Address:** `{active_wallet['address']}`\n"
-            f"**MON Balance:** `{balance:.6f} MON`\n\n"
-            f"🔗 **Explorer:** [View on Explorer](https://testnet.monadexplorer.com/address/{active_wallet['address']})",
-            reply_markup=get_back_to_menu_keyboard(),
-            parse_mode='Markdown'
+            f"💰 <b>Balance - {html.escape(active_wallet['name'])}</b>\n\n"
+            f"<b>Address:</b> <code>{active_wallet['address']}</code>\n"
+            f"<b>MON Balance:</b> <code>{balance:.6f} MON</code>\n\n"
+            f"🔗 <b>Explorer:</b> <a href='https://testnet.monadexplorer.com/address/{active_wallet['address']}'>View on Explorer</a>",
+            reply_markup=BACK_TO_MENU_KEYBOARD
         )
     except Exception as e:
         logger.error(f"Error checking balance: {e}")
         await query.edit_message_text(
-            "❌ **Error checking balance.** Please try again later.",
-            reply_markup=get_back_to_menu_keyboard()
+            "❌ <b>Error checking balance.</b> Please try again later.",
+            reply_markup=BACK_TO_MENU_KEYBOARD
         )
 
 async def start_swap_handler(query, context):
@@ -846,31 +1277,29 @@ async def start_swap_handler(query, context):
     active_wallet = kuru_bot.db.get_active_wallet(user_id)
     if not active_wallet:
         await query.edit_message_text(
-            "❌ **No active wallet found!** Please create a wallet first.",
-            reply_markup=get_back_to_menu_keyboard()
+            "❌ <b>No active wallet found!</b> Please create a wallet first.",
+            reply_markup=BACK_TO_MENU_KEYBOARD
         )
         return
     
-    balance = kuru_bot.get_mon_balance(active_wallet['address'])
+    balance = await _run(kuru_bot.get_mon_balance, active_wallet['address'])
     if balance <= 0:
         await query.edit_message_text(
-            f"❌ **Insufficient Balance!**\n\n"
-            f"**Wallet:** {active_wallet['name']}\n"
-            f"**Balance:** `{balance:.6f} MON`\n\n"
+            f"❌ <b>Insufficient Balance!</b>\n\n"
+            f"<b>Wallet:</b> {html.escape(active_wallet['name'])}\n"
+            f"<b>Balance:</b> <code>{balance:.6f} MON</code>\n\n"
             f"Please deposit some MON tokens to your wallet first.",
-            reply_markup=get_back_to_menu_keyboard(),
-            parse_mode='Markdown'
+            reply_markup=BACK_TO_MENU_KEYBOARD
         )
         return
     
     await query.edit_message_text(
-        f"🔄 **Start Token Swap**\n\n"
-        f"**Active Wallet:** {active_wallet['name']}\n"
-        f"**Balance:** `{balance:.6f} MON`\n\n"
-        f"Please send me the **token contract address** you want to swap to.\n\n"
-        f"Example: `0xe0590015a873bf326bd645c3e1266d4db41c4e6b`",
-        reply_markup=get_cancel_keyboard(),
-        parse_mode='Markdown'
+        f"🔄 <b>Start Token Swap</b>\n\n"
+        f"<b>Active Wallet:</b> {html.escape(active_wallet['name'])}\n"
+        f"<b>Balance:</b> <code>{balance:.6f} MON</code>\n\n"
+        f"Please send me the <b>token contract address</b> you want to swap to.\n\n"
+        f"Example: <code>0xe0590015a873bf326bd645c3e1266d4db41c4e6b</code>",
+        reply_markup=CANCEL_KEYBOARD
     )
     
     return AWAITING_TOKEN_ADDRESS
@@ -878,10 +1307,10 @@ async def start_swap_handler(query, context):
 async def tx_history_handler(query, context):
     """Show transaction history."""
     await query.edit_message_text(
-        "📊 **Transaction History**\n\n"
+        "📊 <b>Transaction History</b>\n\n"
         "This feature will show your recent swaps and transactions.\n"
         "(Coming soon in next update!)",
-        reply_markup=get_back_to_menu_keyboard()
+        reply_markup=BACK_TO_MENU_KEYBOARD
     )
 
 async def handle_token_address(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -890,33 +1319,39 @@ async def handle_token_address(update: Update, context: ContextTypes.DEFAULT_TYP
     token_address = update.message.text.strip()
     
     # Validate token address
-    if not w3.is_address(token_address):
+    if not _ADDR_RE.fullmatch(token_address):
         await update.message.reply_text(
-            "❌ **Invalid token address!** Please send a valid Ethereum address.",
-            reply_markup=get_cancel_keyboard()
+            "❌ <b>Invalid token address!</b> Please send a valid Ethereum address.",
+            reply_markup=CANCEL_KEYBOARD
         )
         return AWAITING_TOKEN_ADDRESS
     
-    # Get token info
-    token_info = kuru_bot.get_token_info(token_address)
+    # Normalise casing once; the lookups and replies below use the checksummed form
+    token_address = cs(token_address)
+    
+    # Token info, pool lookup and wallet balance are independent, so fetch them together
+    active_wallet = kuru_bot.db.get_active_wallet(user_id)
+    token_info, pool_address, balance = await asyncio.gather(
+        _run(kuru_bot.get_token_info, token_address),
+        kuru_bot.filter_market_pools(MON_ADDRESS, token_address),
+        _run(kuru_bot.get_mon_balance, active_wallet['address'])
+    )
     if not token_info:
         await update.message.reply_text(
-            "❌ **Invalid token!** Could not fetch token information. "
+            "❌ <b>Invalid token!</b> Could not fetch token information. "
             "Please make sure the address is correct.",
-            reply_markup=get_cancel_keyboard()
+            reply_markup=CANCEL_KEYBOARD
         )
         return AWAITING_TOKEN_ADDRESS
     
     # Check if pool exists
-    pool_address = kuru_bot.filter_market_pools(MON_ADDRESS, token_address)
     if not pool_address:
         await update.message.reply_text(
-            f"❌ **No trading pool found!**\n\n"
-            f"Token: **{token_info['name']} ({token_info['symbol']})**\n"
-            f"Address: `{token_address}`\n\n"
+            f"❌ <b>No trading pool found!</b>\n\n"
+            f"Token: <b>{html.escape(token_info['name'])} ({html.escape(token_info['symbol'])})</b>\n"
+            f"Address: <code>{token_address}</code>\n\n"
             f"This token cannot be traded on KuruSwap yet.",
-            reply_markup=get_back_to_menu_keyboard(),
-            parse_mode='Markdown'
+            reply_markup=BACK_TO_MENU_KEYBOARD
         )
         return ConversationHandler.END
     
@@ -924,19 +1359,15 @@ async def handle_token_address(update: Update, context: ContextTypes.DEFAULT_TYP
     context.user_data['token_info'] = token_info
     context.user_data['pool_address'] = pool_address
     
-    active_wallet = kuru_bot.db.get_active_wallet(user_id)
-    balance = kuru_bot.get_mon_balance(active_wallet['address'])
-    
     await update.message.reply_text(
-        f"✅ **Token Found!**\n\n"
-        f"**Token:** {token_info['name']} ({token_info['symbol']})\n"
-        f"**Address:** `{token_address}`\n"
-        f"**Pool:** `{pool_address}`\n\n"
-        f"**Active Wallet:** {active_wallet['name']}\n"
-        f"**MON Balance:** `{balance:.6f} MON`\n\n"
-        f"💡 **How much MON do you want to swap?**\n"
-        f"Please enter the amount (e.g., 0.1, 1.5, 10):",
-        parse_mode='Markdown'
+        f"✅ <b>Token Found!</b>\n\n"
+        f"<b>Token:</b> {html.escape(token_info['name'])} ({html.escape(token_info['symbol'])})\n"
+        f"<b>Address:</b> <code>{token_address}</code>\n"
+        f"<b>Pool:</b> <code>{pool_address}</code>\n\n"
+        f"<b>Active Wallet:</b> {html.escape(active_wallet['name'])}\n"
+        f"<b>MON Balance:</b> <code>{balance:.6f} MON</code>\n\n"
+        f"💡 <b>How much MON do you want to swap?</b>\n"
+        f"Please enter the amount (e.g., 0.1, 1.5, 10):"
     )
     
     return AWAITING_SWAP_AMOUNT
@@ -952,46 +1383,39 @@ async def handle_swap_amount(update: Update, context: ContextTypes.DEFAULT_TYPE)
             raise ValueError("Amount must be positive")
     except ValueError:
         await update.message.reply_text(
-            "❌ **Invalid amount!** Please enter a valid positive number.",
-            reply_markup=get_cancel_keyboard()
+            "❌ <b>Invalid amount!</b> Please enter a valid positive number.",
+            reply_markup=CANCEL_KEYBOARD
         )
         return AWAITING_SWAP_AMOUNT
     
     active_wallet = kuru_bot.db.get_active_wallet(user_id)
-    balance = kuru_bot.get_mon_balance(active_wallet['address'])
+    balance = await _run(kuru_bot.get_mon_balance, active_wallet['address'])
     
     if amount > balance:
         await update.message.reply_text(
-            f"❌ **Insufficient balance!**\n\n"
-            f"**Wallet:** {active_wallet['name']}\n"
-            f"**You want to swap:** `{amount} MON`\n"
-            f"**Your balance:** `{balance:.6f} MON`\n\n"
+            f"❌ <b>Insufficient balance!</b>\n\n"
+            f"<b>Wallet:</b> {html.escape(active_wallet['name'])}\n"
+            f"<b>You want to swap:</b> <code>{amount} MON</code>\n"
+            f"<b>Your balance:</b> <code>{balance:.6f} MON</code>\n\n"
             f"Please enter a smaller amount.",
-            reply_markup=get_cancel_keyboard(),
-            parse_mode='Markdown'
+            reply_markup=CANCEL_KEYBOARD
         )
         return AWAITING_SWAP_AMOUNT
     
     token_info = context.user_data['token_info']
     
     # Confirm swap
-    keyboard = [
-        [InlineKeyboardButton("✅ Confirm Swap", callback_data=f"confirm_swap_{amount}")],
-        [InlineKeyboardButton("❌ Cancel", callback_data="cancel_swap")],
-        [InlineKeyboardButton("🏠 Back to Menu", callback_data="back_to_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = confirm_swap_keyboard(amount)
     
     await update.message.reply_text(
-        f"🔄 **Confirm Your Swap**\n\n"
-        f"**From:** `{amount} MON`\n"
-        f"**To:** {token_info['name']} ({token_info['symbol']})\n"
-        f"**Token Address:** `{token_info['address']}`\n\n"
-        f"⚠️ **Slippage:** 15% (for safety)\n"
-        f"💰 **Estimated Gas:** ~0.01 MON\n\n"
-        f"**Are you sure you want to proceed?**",
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+        f"🔄 <b>Confirm Your Swap</b>\n\n"
+        f"<b>From:</b> <code>{amount} MON</code>\n"
+        f"<b>To:</b> {html.escape(token_info['name'])} ({html.escape(token_info['symbol'])})\n"
+        f"<b>Token Address:</b> <code>{token_info['address']}</code>\n\n"
+        f"⚠️ <b>Slippage:</b> 15% (for safety)\n"
+        f"💰 <b>Estimated Gas:</b> ~0.01 MON\n\n"
+        f"<b>Are you sure you want to proceed?</b>",
+        reply_markup=reply_markup
     )
     
     return ConversationHandler.END
@@ -1003,11 +1427,10 @@ async def handle_wallet_name(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     if len(wallet_name) < 1 or len(wallet_name) > 50:
         await update.message.reply_text(
-            "❌ **Invalid wallet name!**\n\n"
+            "❌ <b>Invalid wallet name!</b>\n\n"
             "Wallet name must be between 1 and 50 characters.\n\n"
             "Please try again:",
-            reply_markup=get_cancel_keyboard(),
-            parse_mode='Markdown'
+            reply_markup=CANCEL_KEYBOARD
         )
         return AWAITING_WALLET_NAME
     
@@ -1021,26 +1444,25 @@ async def handle_wallet_name(update: Update, context: ContextTypes.DEFAULT_TYPE)
             
             if success:
                 await update.message.reply_text(
-                    f"🎉 **Wallet Created Successfully!**\n\n"
-                    f"**Name:** {wallet_name}\n"
-                    f"**Address:** `{address}`\n\n"
-                    f"🔑 **Private Key:** `{private_key}`\n\n"
-                    f"⚠️ **IMPORTANT:** Save your private key securely! "
+                    f"🎉 <b>Wallet Created Successfully!</b>\n\n"
+                    f"<b>Name:</b> {html.escape(wallet_name)}\n"
+                    f"<b>Address:</b> <code>{address}</code>\n\n"
+                    f"🔑 <b>Private Key:</b> <code>{private_key}</code>\n\n"
+                    f"⚠️ <b>IMPORTANT:</b> Save your private key securely! "
                     f"I'll remember it for you, but you should back it up.\n\n"
-                    f"💰 **Next Step:** Send some MON tokens to your address to start swapping!",
-                    reply_markup=get_back_to_menu_keyboard(),
-                    parse_mode='Markdown'
+                    f"💰 <b>Next Step:</b> Send some MON tokens to your address to start swapping!",
+                    reply_markup=BACK_TO_MENU_KEYBOARD
                 )
             else:
                 await update.message.reply_text(
-                    "❌ **Error creating wallet.** Please try again later.",
-                    reply_markup=get_back_to_menu_keyboard()
+                    "❌ <b>Error creating wallet.</b> Please try again later.",
+                    reply_markup=BACK_TO_MENU_KEYBOARD
                 )
         except Exception as e:
             logger.error(f"Error creating wallet: {e}")
             await update.message.reply_text(
-                "❌ **Error creating wallet.** Please try again later.",
-                reply_markup=get_back_to_menu_keyboard()
+                "❌ <b>Error creating wallet.</b> Please try again later.",
+                reply_markup=BACK_TO_MENU_KEYBOARD
             )
         return ConversationHandler.END
     
@@ -1050,12 +1472,11 @@ async def handle_wallet_name(update: Update, context: ContextTypes.DEFAULT_TYPE)
         context.user_data['state'] = AWAITING_PRIVATE_KEY
         
         await update.message.reply_text(
-            f"📥 **Import Wallet: {wallet_name}**\n\n"
+            f"📥 <b>Import Wallet: {html.escape(wallet_name)}</b>\n\n"
             "Now please send your private key (64 characters starting with 0x).\n\n"
-            "⚠️ **Security Warning**: Make sure you're in a private chat and the message will be auto-deleted.\n\n"
-            "Example format: `0x1234567890abcdef...`",
-            reply_markup=get_cancel_keyboard(),
-            parse_mode='Markdown'
+            "⚠️ <b>Security Warning</b>: Make sure you're in a private chat and the message will be auto-deleted.\n\n"
+            "Example format: <code>0x1234567890abcdef...</code>",
+            reply_markup=CANCEL_KEYBOARD
         )
         
         return AWAITING_PRIVATE_KEY
@@ -1074,15 +1495,14 @@ async def handle_private_key(update: Update, context: ContextTypes.DEFAULT_TYPE)
     except:
         pass  # Ignore if we can't delete the message
     
-    # Validate private key format
-    if not private_key.startswith('0x') or len(private_key) != 66:
+    # Validate private key format before paying for Account.from_key
+    if not _PK_RE.fullmatch(private_key):
         await update.message.reply_text(
-            "❌ **Invalid private key format!**\n\n"
-            "Private key must be 64 characters long and start with '0x'.\n\n"
-            "Example: `0x1234567890abcdef...`\n\n"
+            "❌ <b>Invalid private key format!</b>\n\n"
+            "Private key must be 64 hex characters long and start with '0x'.\n\n"
+            "Example: <code>0x1234567890abcdef...</code>\n\n"
             "Please try again:",
-            reply_markup=get_cancel_keyboard(),
-            parse_mode='Markdown'
+            reply_markup=CANCEL_KEYBOARD
         )
         return AWAITING_PRIVATE_KEY
     
@@ -1096,13 +1516,12 @@ async def handle_private_key(update: Update, context: ContextTypes.DEFAULT_TYPE)
         
         if success:
             await update.message.reply_text(
-                f"🎉 **Wallet Imported Successfully!**\n\n"
-                f"**Name:** {wallet_name}\n"
-                f"**Address:** `{address}`\n\n"
+                f"🎉 <b>Wallet Imported Successfully!</b>\n\n"
+                f"<b>Name:</b> {html.escape(wallet_name)}\n"
+                f"<b>Address:</b> <code>{address}</code>\n\n"
                 f"✅ Your wallet has been imported and is ready to use.\n\n"
-                f"💰 **Next Step:** Check your balance or start swapping!",
-                reply_markup=get_back_to_menu_keyboard(),
-                parse_mode='Markdown'
+                f"💰 <b>Next Step:</b> Check your balance or start swapping!",
+                reply_markup=BACK_TO_MENU_KEYBOARD
             )
             
             # Clear conversation state
@@ -1110,18 +1529,17 @@ async def handle_private_key(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return ConversationHandler.END
         else:
             await update.message.reply_text(
-                "❌ **Error importing wallet.** Please try again later.",
-                reply_markup=get_cancel_keyboard()
+                "❌ <b>Error importing wallet.</b> Please try again later.",
+                reply_markup=CANCEL_KEYBOARD
             )
             return AWAITING_PRIVATE_KEY
             
     except Exception as e:
         logger.error(f"Error importing wallet: {e}")
         await update.message.reply_text(
-            "❌ **Invalid private key!**\n\n"
+            "❌ <b>Invalid private key!</b>\n\n"
             "The private key you provided is not valid. Please check and try again:",
-            reply_markup=get_cancel_keyboard(),
-            parse_mode='Markdown'
+            reply_markup=CANCEL_KEYBOARD
         )
         return AWAITING_PRIVATE_KEY
 
@@ -1136,8 +1554,8 @@ async def confirm_swap_handler(update: Update, context: ContextTypes.DEFAULT_TYP
         amount = float(query.data.split("_")[-1])
         
         await query.edit_message_text(
-            f"⏳ **Processing your swap...**\n\n"
-            f"Swapping `{amount} MON` to tokens...\n"
+            f"⏳ <b>Processing your swap...</b>\n\n"
+            f"Swapping <code>{amount} MON</code> to tokens...\n"
             f"Please wait, this may take a few moments."
         )
         
@@ -1146,24 +1564,41 @@ async def confirm_swap_handler(update: Update, context: ContextTypes.DEFAULT_TYP
         
         if not active_wallet:
             await query.edit_message_text(
-                "❌ **Error:** No active wallet found. Please create a wallet first.",
-                reply_markup=get_back_to_menu_keyboard()
+                "❌ <b>Error:</b> No active wallet found. Please create a wallet first.",
+                reply_markup=BACK_TO_MENU_KEYBOARD
+            )
+            return
+        
+        if active_wallet['private_key'] is None:
+            await query.edit_message_text(
+                "🔑 <b>Error:</b> The private key of this wallet cannot be decrypted.\n\n"
+                "The bot's encryption key (WALLET_AES_KEY/BOT_KEY) has changed since the wallet was saved. "
+                "Ask the bot operator to restore the original key.",
+                reply_markup=BACK_TO_MENU_KEYBOARD
             )
             return
         
         if not token_info:
             await query.edit_message_text(
-                "❌ **Error:** Token information not found. Please start over.",
-                reply_markup=get_back_to_menu_keyboard()
+                "❌ <b>Error:</b> Token information not found. Please start over.",
+                reply_markup=BACK_TO_MENU_KEYBOARD
             )
             return
         
-        # Perform swap
-        tx_hash = kuru_bot.perform_swap(
-            active_wallet['private_key'],
-            token_info['address'],
-            amount
-        )
+        # Perform swap (the pool was looked up when the token was entered)
+        pool_address = context.user_data.get('pool_address')
+        if not pool_address:
+            pool_address = await kuru_bot.filter_market_pools(MON_ADDRESS, token_info['address'])
+        
+        tx_hash = None
+        if pool_address:
+            tx_hash = await _run(
+                kuru_bot.perform_swap,
+                active_wallet['private_key'],
+                token_info['address'],
+                amount,
+                pool_address
+            )
         
         if tx_hash:
             # Log transaction
@@ -1171,88 +1606,88 @@ async def confirm_swap_handler(update: Update, context: ContextTypes.DEFAULT_TYP
                 active_wallet['id'], tx_hash, "swap", str(amount), token_info['address'], "pending"
             )
             
+            kuru_bot.invalidate_balance(active_wallet['address'])
+            
+            tx_hash_hex = Web3.to_hex(tx_hash)
             await query.edit_message_text(
-                f"🎉 **Swap Transaction Sent!**\n\n"
-                f"**Amount:** `{amount} MON`\n"
-                f"**Token:** {token_info['name']} ({token_info['symbol']})\n"
-                f"**Transaction Hash:** `{tx_hash}`\n\n"
-                f"🔗 [View on Explorer]({TX_EXPLORER}{tx_hash})\n\n"
-                f"⏳ **Status:** Pending confirmation...",
-                reply_markup=get_back_to_menu_keyboard(),
-                parse_mode='Markdown'
+                f"🎉 <b>Swap Transaction Sent!</b>\n\n"
+                f"<b>Amount:</b> <code>{amount} MON</code>\n"
+                f"<b>Token:</b> {html.escape(token_info['name'])} ({html.escape(token_info['symbol'])})\n"
+                f"<b>Transaction Hash:</b> <code>{tx_hash_hex}</code>\n\n"
+                f"🔗 <a href='{TX_EXPLORER}{tx_hash_hex}'>View on Explorer</a>\n\n"
+                f"⏳ <b>Status:</b> Pending confirmation...",
+                reply_markup=BACK_TO_MENU_KEYBOARD
             )
         else:
             await query.edit_message_text(
-                f"❌ **Swap Failed!**\n\n"
+                f"❌ <b>Swap Failed!</b>\n\n"
                 f"The transaction could not be processed. Possible reasons:\n"
                 f"• Insufficient gas\n"
                 f"• Network congestion\n"
                 f"• Pool liquidity issues\n\n"
                 f"Please try again later.",
-                reply_markup=get_back_to_menu_keyboard()
+                reply_markup=BACK_TO_MENU_KEYBOARD
             )
     
     elif query.data == "cancel_swap":
         await query.edit_message_text(
-            "❌ **Swap Cancelled**\n\n"
+            "❌ <b>Swap Cancelled</b>\n\n"
             "Your swap has been cancelled. No tokens were exchanged.",
-            reply_markup=get_back_to_menu_keyboard()
+            reply_markup=BACK_TO_MENU_KEYBOARD
         )
 
 async def back_to_menu_handler(query, context):
     """Handle back to menu button."""
     user = query.from_user
     
-    welcome_text = f"""
-🚀 **Welcome to KuruSwap Bot!** 🚀
-
-Hello {user.first_name}! I'm your personal KuruSwap assistant on Monad Testnet.
-
-**What I can do:**
-• Create secure wallets for you
-• Check your MON balance
-• Swap MON tokens to any valid token address
-• Track your transaction history
-
-**Getting Started:**
-1. Create a wallet first
-2. Deposit some MON tokens
-3. Start swapping!
-
-⚠️ **Important:** This bot operates on Monad Testnet. Use only testnet tokens!
-    """
-    
-    await query.edit_message_text(welcome_text, reply_markup=get_main_keyboard(), parse_mode='Markdown')
+    await query.edit_message_text(welcome_text(user.first_name), reply_markup=MAIN_KEYBOARD)
 
 async def cancel_operation_handler(query, context):
     """Handle cancel operation button."""
     await query.edit_message_text(
-        "❌ **Operation cancelled.**\n\n"
+        "❌ <b>Operation cancelled.</b>\n\n"
         "What would you like to do next?",
-        reply_markup=get_main_keyboard()
+        reply_markup=MAIN_KEYBOARD
     )
     return ConversationHandler.END
 
 async def cancel_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Cancel conversation."""
     await update.message.reply_text(
-        "❌ **Operation cancelled.**\n\n"
+        "❌ <b>Operation cancelled.</b>\n\n"
         "Use /start to begin again.",
-        reply_markup=get_main_keyboard()
+        reply_markup=MAIN_KEYBOARD
     )
     return ConversationHandler.END
 
+async def post_init(application: Application):
+    """Route every default run_in_executor/to_thread call through EXECUTOR."""
+    asyncio.get_running_loop().set_default_executor(EXECUTOR)
+
+async def post_shutdown(application: Application):
+    """Release network resources when the bot stops."""
+    await kuru_bot.close()
+
 def main():
     """Start the bot."""
-    # Create application
-    application = Application.builder().token(BOT_TOKEN).build()
+    # Create application. Updates are processed one by one, as ConversationHandler
+    # requires; the slow handlers are registered with block=False instead
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .defaults(Defaults(parse_mode=ParseMode.HTML))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
     # Add conversation handler for swaps
     swap_conv_handler = ConversationHandler(
         entry_points=[CallbackQueryHandler(button_handler, pattern="^start_swap$")],
         states={
-            AWAITING_TOKEN_ADDRESS: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_token_address)],
-            AWAITING_SWAP_AMOUNT: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_swap_amount)],
+            AWAITING_TOKEN_ADDRESS: [MessageHandler(filters.TEXT & ~filters.COMMAND, debounced(handle_token_address), block=False)],
+            AWAITING_SWAP_AMOUNT: [MessageHandler(filters.TEXT & ~filters.COMMAND, debounced(handle_swap_amount), block=False)],
+            ConversationHandler.WAITING: [MessageHandler(filters.TEXT & ~filters.COMMAND, collect_burst)],
         },
         fallbacks=[CommandHandler("cancel", cancel_handler)],
     )
@@ -1263,6 +1698,8 @@ def main():
             CallbackQueryHandler(button_handler, pattern="^(create_wallet|import_wallet)$")
         ],
         states={
+            # Not debounced: a key sent right after the name must not be taken as the name,
+            # and every key message must reach its handler so it gets deleted
             AWAITING_WALLET_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_wallet_name)],
             AWAITING_PRIVATE_KEY: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_private_key)],
         },
@@ -1274,7 +1711,7 @@ def main():
     application.add_handler(swap_conv_handler)
     application.add_handler(wallet_conv_handler)
     application.add_handler(CallbackQueryHandler(button_handler))
-    application.add_handler(CallbackQueryHandler(confirm_swap_handler, pattern="^(confirm_swap_|cancel_swap)"))
+    application.add_handler(CallbackQueryHandler(confirm_swap_handler, pattern="^(confirm_swap_|cancel_swap)", block=False))
     
     # Start the bot
     print("🚀 KuruSwap Telegram Bot is starting...")
@@ -1282,7 +1719,13 @@ def main():
     print(f"🔗 RPC: {RPC_URL}")
     print("✅ Bot is ready!")
     
-    application.run_polling()
+    # Long-poll for 50s per request and only receive the update types we handle
+    application.run_polling(
+        timeout=50,
+        poll_interval=0.0,
+        allowed_updates=[Update.MESSAGE, Update.CALLBACK_QUERY],
+        drop_pending_updates=True
+    )
 
 if __name__ == '__main__':
     main()
@@ -6,10 +6,20 @@ This script tests the core functionality of the KuruSwap bot
 without requiring a Telegram bot token.
 """
 
+import asyncio
+import io
 import os
+import re
+import sqlite3
 import sys
+import tempfile
+import threading
+from eth_account import Account
 from web3 import Web3
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 try:
     from dotenv import load_dotenv
@@ -26,6 +36,7 @@ MON_ADDRESS = "0x0000000000000000000000000000000000000000"
 WMON_ADDRESS = "0x760AfE86e5de5fa0Ee542fc7B7B713e1c5425701"
 ROUTER_ADDRESS = "0xc816865f172d640d93712C68a7E1F83F3fA63235"
 KURU_UTILS_ADDRESS = "0x9E50D9202bEc0D046a75048Be8d51bBa93386Ade"
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
 
 # Test token addresses
 TEST_TOKENS = {
@@ -35,12 +46,33 @@ TEST_TOKENS = {
     "WMON": WMON_ADDRESS
 }
 
-ERC20_ABI = [
-    {"inputs": [], "name": "name", "outputs": [{"internalType": "string", "name": "", "type": "string"}], "stateMutability": "view", "type": "function"},
-    {"inputs": [], "name": "symbol", "outputs": [{"internalType": "string", "name": "", "type": "string"}], "stateMutability": "view", "type": "function"},
-    {"inputs": [], "name": "decimals", "outputs": [{"internalType": "uint8", "name": "", "type": "uint8"}], "stateMutability": "view", "type": "function"}
+# Shared session so both Kuru API calls reuse one keep-alive connection
+KURU_HTTP = requests.Session()
+KURU_HTTP.headers.update({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Content-Type": "application/json"
+})
+_kuru_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+)
+KURU_HTTP.mount("https://", _kuru_adapter)
+KURU_HTTP.mount("http://", _kuru_adapter)
+
+# ERC20 metadata selectors, computed once so token reads skip contract ABI dispatch
+NAME_SELECTOR = Web3.keccak(text="name()")[:4]
+SYMBOL_SELECTOR = Web3.keccak(text="symbol()")[:4]
+DECIMALS_SELECTOR = Web3.keccak(text="decimals()")[:4]
+TOKEN_SELECTORS = (NAME_SELECTOR, SYMBOL_SELECTOR, DECIMALS_SELECTOR)
+
+MULTICALL3_ABI = [
+    {"inputs": [{"components": [{"internalType": "address", "name": "target", "type": "address"}, {"internalType": "bool", "name": "allowFailure", "type": "bool"}, {"internalType": "bytes", "name": "callData", "type": "bytes"}], "internalType": "struct Multicall3.Call3[]", "name": "calls", "type": "tuple[]"}], "name": "aggregate3", "outputs": [{"components": [{"internalType": "bool", "name": "success", "type": "bool"}, {"internalType": "bytes", "name": "returnData", "type": "bytes"}], "internalType": "struct Multicall3.Result[]", "name": "returnData", "type": "tuple[]"}], "stateMutability": "payable", "type": "function"}
 ]
 
+# Numeric part of string chain IDs like 'zgtendermint_16600-2'
+_CHAIN_ID_RE = re.compile(r'(\d+)')
+
 def test_web3_connection():
     """Test Web3 connection to Monad testnet."""
     print("🌐 Testing Web3 connection...")
@@ -58,8 +90,7 @@ def test_web3_connection():
         numeric_chain_id = None
         if isinstance(chain_id, str):
             # Try to extract numeric part from string
-            import re
-            match = re.search(r'(\d+)', chain_id)
+            match = _CHAIN_ID_RE.search(chain_id)
             if match:
                 numeric_chain_id = int(match.group(1))
         elif isinstance(chain_id, int):
@@ -85,12 +116,33 @@ def test_token_contracts():
     try:
         w3 = Web3(Web3.HTTPProvider(RPC_URL))
         
-        for symbol, address in TEST_TOKENS.items():
+        # name/symbol/decimals for every test token in a single Multicall3 round trip
+        calls = [
+            (Web3.to_checksum_address(address), True, selector)
+            for address in TEST_TOKENS.values() for selector in TOKEN_SELECTORS
+        ]
+        try:
+            multicall = w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+            results = multicall.functions.aggregate3(calls).call()
+        except Exception as e:
+            print(f"⚠️ Multicall3 unavailable ({e}), querying tokens one by one")
+            results = None
+        
+        for i, (symbol, address) in enumerate(TEST_TOKENS.items()):
             try:
-                contract = w3.eth.contract(address=address, abi=ERC20_ABI)
-                name = contract.functions.name().call()
-                token_symbol = contract.functions.symbol().call()
-                decimals = contract.functions.decimals().call()
+                if results is None:
+                    to = Web3.to_checksum_address(address)
+                    name_data, symbol_data, decimals_data = (
+                        w3.eth.call({'to': to, 'data': selector}) for selector in TOKEN_SELECTORS
+                    )
+                else:
+                    (name_ok, name_data), (symbol_ok, symbol_data), (decimals_ok, decimals_data) = results[i * 3:i * 3 + 3]
+                    if not (name_ok and symbol_ok and decimals_ok):
+                        raise ValueError("metadata call reverted")
+                
+                name = w3.codec.decode(['string'], name_data)[0]
+                token_symbol = w3.codec.decode(['string'], symbol_data)[0]
+                decimals = w3.codec.decode(['uint8'], decimals_data)[0]
                 
                 print(f"✅ {symbol}: {name} ({token_symbol}) - {decimals} decimals")
             except Exception as e:
@@ -111,18 +163,14 @@ def test_kuru_api():
             "quoteToken": TEST_TOKENS["CHOG"]
         }]
         
-        response = requests.post(
+        response = KURU_HTTP.post(
             "https://api.testnet.kuru.io/api/v1/markets/filtered",
-            json={"pairs": pairs},
-            headers={
-                "Content-Type": "application/json",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            },
+            data=orjson.dumps({"pairs": pairs}),
             timeout=10
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             if data.get('data') and len(data['data']) > 0:
                 pool_address = data['data'][0]['market']
                 print(f"✅ Found pool for MON/CHOG: {pool_address}")
@@ -133,11 +181,8 @@ def test_kuru_api():
             return False
         
         # Test token search endpoint
-        response = requests.get(
+        response = KURU_HTTP.get(
             "https://api.testnet.kuru.io/api/v2/tokens/search?limit=5&q=",
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            },
             timeout=10
         )
         
@@ -155,8 +200,6 @@ def test_wallet_creation():
     """Test wallet creation functionality."""
     print("\n🔐 Testing wallet creation...")
     try:
-        from eth_account import Account
-        
         # Create a test wallet
         account = Account.create()
         address = account.address
@@ -183,10 +226,6 @@ def test_database():
     """Test database functionality."""
     print("\n🗄️ Testing database...")
     try:
-        import sqlite3
-        import tempfile
-        import os
-        
         # Create temporary database
         with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
             db_path = tmp.name
@@ -244,6 +283,7 @@ def test_dependencies():
         'web3': 'Web3',
         'eth_account': 'Account',
         'requests': 'requests',
+        'orjson': 'orjson',
         'telegram': 'telegram',
         'sqlite3': 'sqlite3'  # Built-in
     }
@@ -259,6 +299,8 @@ def test_dependencies():
                 from eth_account import Account
             elif package == 'requests':
                 import requests
+            elif package == 'orjson':
+                import orjson
             elif package == 'sqlite3':
                 import sqlite3
             print(f"✅ {package}")
@@ -274,6 +316,40 @@ def test_dependencies():
     print("✅ All dependencies installed")
     return True
 
+class _ThreadOutput(io.TextIOBase):
+    """stdout proxy that sends each worker thread's prints to its own buffer."""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+    
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        return (buffer or self.stream).write(text)
+    
+    def flush(self):
+        self.stream.flush()
+
+def _run_captured(output, test_func):
+    """Run one test on the current thread, returning its result (or exception) and output."""
+    buffer = io.StringIO()
+    output.local.buffer = buffer
+    try:
+        result = test_func()
+    except Exception as e:
+        result = e
+    finally:
+        output.local.buffer = None
+    return result, buffer.getvalue()
+
+async def _run_concurrently(output, tests):
+    """Run independent tests side by side on worker threads."""
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(
+        loop.run_in_executor(None, _run_captured, output, test_func)
+        for _, test_func in tests
+    ))
+
 def main():
     """Run all integration tests."""
     print("🧪 KuruSwap Integration Tests")
@@ -291,15 +367,24 @@ def main():
     passed = 0
     total = len(tests)
     
-    for test_name, test_func in tests:
+    # The tests share nothing, so total time is the slowest test rather than the sum;
+    # output is buffered per test and printed in the usual order afterwards
+    output = _ThreadOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        results = asyncio.run(_run_concurrently(output, tests))
+    finally:
+        sys.stdout = output.stream
+    
+    for (test_name, _), (result, test_output) in zip(tests, results):
         print(f"\n{'='*20} {test_name} {'='*20}")
-        try:
-            if test_func():
-                passed += 1
-            else:
-                print(f"❌ {test_name} test failed")
-        except Exception as e:
-            print(f"❌ {test_name} test crashed: {e}")
+        print(test_output, end="")
+        if isinstance(result, Exception):
+            print(f"❌ {test_name} test crashed: {result}")
+        elif result:
+            passed += 1
+        else:
+            print(f"❌ {test_name} test failed")
     
     print("\n" + "=" * 50)
     print(f"📊 Test Results: {passed}/{total} tests passed")